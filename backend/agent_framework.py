@@ -1,9 +1,12 @@
+import heapq
 import logging
 from datetime import datetime, timedelta
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 
+from metrics import DOCUMENTS, stage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -29,20 +32,23 @@ class JDAnalyzerAgent(Agent):
         
     def analyze_jd(self, jd_text: str) -> Dict:
         """Analyze a job description to extract key information"""
-        from jd_embedding_utils import generate_jd_embedding, extract_sections
+        from jd_embedding_utils import analyze_jd_text
         
         self.log_action("Analyzing job description", {"length": len(jd_text)})
         
-        # Extract and generate embeddings
-        title, embedding = generate_jd_embedding(jd_text)
-        sections = extract_sections(jd_text)
+        # Extract sections and generate embeddings from a single parse
+        with stage("analyze_jd"):
+            analysis = analyze_jd_text(jd_text)
+        DOCUMENTS.inc(kind="jd")
+        title = analysis["title"]
+        sections = analysis["sections"]
         
         # Generate summary
         summary = self.generate_summary(sections)
         
         result = {
             "title": title,
-            "embedding": embedding,
+            "embedding": analysis["embedding"],
             "sections": sections,
             "summary": summary
         }
@@ -88,26 +94,25 @@ class CVAnalyzerAgent(Agent):
         
     def process_cv(self, file_path: str, filename: str) -> Dict:
         """Process a CV to extract key information"""
-        from resume_embedding_utils import pdf_to_text, extract_resume_sections, generate_resume_embedding
+        from resume_embedding_utils import pdf_to_text, extract_resume_sections, embed_resume_sections
         
         self.log_action("Processing CV", {"filename": filename})
         
-        # Extract text from PDF
-        text = pdf_to_text(file_path)
-        
-        # Parse CV sections
-        parsed_sections = extract_resume_sections(text)
-        
-        # Generate section-specific embeddings
-        section_embeddings = {}
-        for section in ["experience", "education", "skills", "projects", "certifications", "tech_stack"]:
-            if section in parsed_sections and parsed_sections[section]:
-                section_text = " ".join(parsed_sections[section])
-                if section_text.strip():
-                    from sentence_transformers import SentenceTransformer
-                    model = SentenceTransformer("all-MiniLM-L6-v2")
-                    section_embeddings[section] = model.encode(section_text, convert_to_numpy=True)
+        with stage("process_cv"):
+            # Extract text from PDF
+            text = pdf_to_text(file_path)
+            
+            # Parse CV sections
+            parsed_sections = extract_resume_sections(text)
+            
+            # Generate section-specific embeddings with the shared model
+            section_embeddings = embed_resume_sections(parsed_sections)
         
+        return self.build_result(filename, text, parsed_sections, section_embeddings)
+    
+    def build_result(self, filename: str, text: str, parsed_sections: Dict, section_embeddings: Dict) -> Dict:
+        """Assemble the CV result from already parsed and embedded sections"""
+        DOCUMENTS.inc(kind="resume")
         # Generate summary
         summary = self.generate_summary(parsed_sections)
         
@@ -119,6 +124,7 @@ class CVAnalyzerAgent(Agent):
         }
         
         self.log_action("CV processing complete", {
+            "filename": filename,
             "sections_found": list(parsed_sections.keys())
         })
         
@@ -170,53 +176,52 @@ class MatchingAgent(Agent):
         super().__init__("Matcher")
         self.threshold = threshold
         
-    def match_cvs_to_jd(self, jd_data: Dict, cv_data: Dict[str, Dict]) -> Dict:
-        """Match multiple CVs against a job description"""
-        from matcher import match_all_resumes
+    def match_cvs_to_jd(self, jd_data: Dict, cv_data: Dict[str, Dict], top_k: Optional[int] = None) -> Dict:
+        """Match multiple CVs against a job description, best first (only the top_k if given)"""
+        from matcher import pack_resume_embeddings, score_packed, explain_match
         
         self.log_action("Starting matching process", {
             "jd_title": jd_data.get("title", "Unknown"),
             "cv_count": len(cv_data)
         })
         
-        jd_title = jd_data.get("title", "Unknown Position")
         jd_embeddings = jd_data.get("embedding", {})
         
-        # Match each CV against the JD
+        # Score every CV against the JD in one vectorized pass
+        packed = pack_resume_embeddings(cv_data)
+        scores, sim_resp, sim_qual = score_packed(jd_embeddings, packed)
+        rounded = [round(float(score), 3) for score in scores]
+        
+        # Pick the best rows with a heap instead of sorting every match
+        best_rows = heapq.nlargest(
+            len(rounded) if top_k is None else top_k,
+            range(len(rounded)),
+            key=rounded.__getitem__
+        )
+        
         matches = []
-        for filename, resume_data in cv_data.items():
-            parsed = resume_data["parsed"]
-            embedding = resume_data.get("embedding", {})
+        for row in best_rows:
+            filename = packed.keys[row]
+            parsed = cv_data[filename]["parsed"]
             
             # Extract name from parsed CV or use filename
             name = self._extract_name(parsed, filename)
-            
-            from matcher import calculate_match_score
-            score, reasoning = calculate_match_score(jd_embeddings, embedding)
+            score = rounded[row]
             
             match_data = {
                 "name": name,
                 "filename": filename,
                 "score": score,
-                "reasoning": reasoning,
+                "reasoning": explain_match(float(sim_resp[row]), float(sim_qual[row])),
                 "isMatch": score >= self.threshold  # Use threshold for matching
             }
             
-            self.log_action("CV matched", {
-                "name": name,
-                "score": score,
-                "is_match": match_data["isMatch"]
-            })
-            
             matches.append(match_data)
         
-        # Sort matches by score in descending order
-        matches.sort(key=lambda x: x["score"], reverse=True)
-        
         result = {"matches": matches}
         self.log_action("Matching complete", {
-            "total_matches": len(matches),
-            "qualified_matches": sum(1 for m in matches if m["isMatch"])
+            "total_matches": len(rounded),
+            "qualified_matches": sum(1 for score in rounded if score >= self.threshold)
         })
         
         return result
@@ -353,10 +358,10 @@ class AgentCoordinator:
             
         return results
         
-    def match_candidates(self, jd_data: Dict, cv_data: Dict[str, Dict]) -> Dict:
+    def match_candidates(self, jd_data: Dict, cv_data: Dict[str, Dict], top_k: Optional[int] = None) -> Dict:
         """Match candidates with the job description"""
         self.logger.info("Starting candidate matching")
-        return self.matching_agent.match_cvs_to_jd(jd_data, cv_data)
+        return self.matching_agent.match_cvs_to_jd(jd_data, cv_data, top_k)
         
     def schedule_interviews(self, matches: List[Dict], job_title: str) -> List[Dict]:
         """Schedule interviews for matched candidates"""
@@ -0,0 +1,204 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_service import normalize_rows
+from matcher import resume_match_vectors, jd_query_vector, match_all_resumes
+from database import DB_PATH
+from resume_store import list_resume_ids, load_embeddings, get_resumes
+from resume_matrix import ResumeMatrix
+
+ARCHIVE_INDEX_PATH = os.getenv("RECRUITLY_ARCHIVE_INDEX", ".cache/archive_index.npz")
+
+# Default number of inverted lists probed per query
+DEFAULT_NPROBE = 16
+# Shortlist size, as a multiple of top_k, that gets exactly re-scored
+RERANK_FACTOR = 4
+# Rebuild the clustering once this fraction of rows is unclustered
+REBUILD_FRACTION = 0.2
+
+def _kmeans(vectors, nlist, iterations=10, seed=0):
+    """Spherical k-means on a sample of the vectors; returns unit centroids"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * 32)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)].astype(np.float32)
+    centroids = normalize_rows(sample[rng.choice(sample_size, nlist, replace=False)])
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        # Empty clusters keep their previous centroid
+        centroids = np.where(counts[:, None] > 0, normalize_rows(sums), centroids)
+    return centroids
+
+def _assign(vectors, centroids, chunk=65536):
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), chunk):
+        assign[i:i + chunk] = np.argmax(vectors[i:i + chunk].astype(np.float32) @ centroids.T, axis=1)
+    return assign
+
+class ArchiveIndex:
+    """IVF (inverted file) index over every stored resume.
+
+    Each resume is one [responsibilities | qualifications] vector (see
+    matcher.resume_match_vectors) whose inner product with a JD query is its
+    match score. Vectors are clustered with spherical k-means; a query scores
+    the centroids, scans only the nprobe closest lists, and the shortlist is
+    re-scored exactly from the float32 embeddings in the resume store.
+    Vectors are held as float16 since only the shortlist needs exact scores.
+
+    Resumes stored after the last build are picked up on the next query and
+    scanned exhaustively until the next rebuild. Queries never re-cluster:
+    once rebuild_due(), callers run rebuild_if_due() in the background (or
+    rebuild() explicitly), and queries keep using the current lists until
+    the new ones are swapped in.
+    """
+    def __init__(self, path: str = ARCHIVE_INDEX_PATH, db_path: str = DB_PATH):
+        self.path = path
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.centroids = None
+        self.vectors = np.zeros((0, 0), dtype=np.float16)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.list_rows = np.zeros(0, dtype=np.int64)
+        self.n_clustered = 0
+        self._rebuilding = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        data = np.load(self.path)
+        self.centroids = data["centroids"]
+        self.vectors = data["vectors"]
+        self.ids = data["ids"]
+        self.list_offsets = data["list_offsets"]
+        self.list_rows = data["list_rows"]
+        self.n_clustered = int(data["n_clustered"])
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                centroids=self.centroids if self.centroids is not None else np.zeros((0, 0), dtype=np.float32),
+                vectors=self.vectors,
+                ids=self.ids,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows,
+                n_clustered=np.int64(self.n_clustered)
+            )
+            os.replace(tmp_path, self.path)
+
+    def _vectors_for(self, resume_ids):
+        packed = ResumeMatrix.from_store(resume_ids, db_path=self.db_path).packed()
+        return resume_match_vectors(packed).astype(np.float16)
+
+    def _append(self, vectors, resume_ids):
+        # Resumes without any embedded section pack to zero-width rows; pad
+        # both sides to a common width (the padding is all zeros either way)
+        width = max(self.vectors.shape[1], vectors.shape[1])
+        widen = lambda m: m if m.shape[1] == width else np.zeros((len(m), width), dtype=np.float16)
+        self.vectors = np.vstack([widen(self.vectors), widen(vectors)])
+        self.ids = np.concatenate([self.ids, np.asarray(resume_ids, dtype=np.int64)])
+
+    def sync(self, batch: int = 10000):
+        """Append resumes stored since the index was last updated (never re-clusters)"""
+        with self._lock:
+            self._load()
+            last_id = int(self.ids.max()) if len(self.ids) else 0
+            new_ids = list_resume_ids(last_id, self.db_path)
+            for i in range(0, len(new_ids), batch):
+                chunk = new_ids[i:i + batch]
+                self._append(self._vectors_for(chunk), chunk)
+
+    def rebuild_due(self) -> bool:
+        """Whether enough rows are unclustered that queries should get new lists"""
+        return len(self.ids) - self.n_clustered > REBUILD_FRACTION * max(self.n_clustered, 1)
+
+    def rebuild_if_due(self):
+        """Rebuild when rebuild_due(); meant for a background task, so runs at most once at a time"""
+        with self._lock:
+            if self._rebuilding or not self.rebuild_due():
+                return
+            self._rebuilding = True
+        try:
+            self.rebuild()
+        finally:
+            self._rebuilding = False
+
+    def rebuild(self, nlist: Optional[int] = None):
+        """Re-cluster every indexed vector and persist the index"""
+        with self._lock:
+            self._load()
+            # Rows are only ever appended, so this prefix stays valid while
+            # queries keep running on the current lists
+            vectors, n = self.vectors, len(self.ids)
+        if n == 0 or vectors.shape[1] == 0:
+            return
+        nlist = nlist or int(np.clip(np.sqrt(n), 1, 4096))
+        nlist = min(nlist, n)
+        centroids = _kmeans(vectors[:n], nlist)
+        assign = _assign(vectors[:n], centroids)
+        with self._lock:
+            self.centroids = centroids
+            self.list_rows = np.argsort(assign, kind="stable").astype(np.int64)
+            self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+            self.n_clustered = n
+        self.save()
+
+    def _candidate_rows(self, query, nprobe):
+        rows = []
+        if self.centroids is not None and len(self.centroids):
+            nprobe = min(nprobe, len(self.centroids))
+            centroid_scores = self.centroids @ query
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            rows = [self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe]
+        # Rows added since the last rebuild are always scanned
+        rows.append(np.arange(self.n_clustered, len(self.ids), dtype=np.int64))
+        return np.concatenate(rows)
+
+    def search_ids(self, jd_embeddings: Dict, top_k: int, nprobe: int = DEFAULT_NPROBE) -> List[int]:
+        """Approximate top-k resume ids for a JD's section embeddings"""
+        self.sync()
+        with self._lock:
+            if len(self.ids) == 0 or self.vectors.shape[1] == 0:
+                return []
+            query = jd_query_vector(jd_embeddings, self.vectors.shape[1] // 2)
+            rows = self._candidate_rows(query, nprobe)
+            if len(rows) == 0:
+                return []
+            scores = self.vectors[rows].astype(np.float32) @ query
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            return [int(self.ids[r]) for r in rows[best]]
+
+    def search(self, jd_title: str, jd_embeddings: Dict, top_k: int = 20,
+               nprobe: int = DEFAULT_NPROBE, threshold: float = 0.8) -> List[Dict]:
+        """Top-k stored resumes for a JD, exactly re-scored and sorted by score"""
+        shortlist = self.search_ids(jd_embeddings, top_k * RERANK_FACTOR, nprobe)
+        records = get_resumes(shortlist, self.db_path)
+        embeddings = load_embeddings(shortlist, self.db_path)
+        resumes = {
+            rid: {**records[rid], "embedding": embeddings[rid]}
+            for rid in shortlist if rid in records
+        }
+        # Key by id so resumes sharing a filename don't collide
+        candidates = match_all_resumes(jd_title, jd_embeddings, resumes, threshold=threshold)
+        for candidate, rid in zip(candidates, resumes):
+            candidate["filename"] = resumes[rid]["filename"]
+            if candidate["name"] == rid:
+                candidate["name"] = os.path.splitext(resumes[rid]["filename"] or str(rid))[0]
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+        return candidates[:top_k]
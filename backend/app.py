@@ -1,22 +1,37 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 import tempfile
+import io
 import os
 import shutil
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 import json
 import numpy as np
 from pathlib import Path
-import asyncio
-from sentence_transformers import SentenceTransformer
-import sqlite3
 
-from jd_embedding_utils import generate_jd_embedding, extract_sections
-from resume_embedding_utils import pdf_to_text, extract_resume_sections, generate_resume_embedding
-from matcher import calculate_match_score, match_all_resumes
+from jd_embedding_utils import analyze_jd_text
+from matcher import (weights, calculate_match_score, build_candidate, score_jds_for_resume, explain_match,
+                     score_matrix)
 from email_utils import send_email
+from database import connect, close_pools
+from resume_store import (init_resume_tables, save_resume, find_resume_by_hash, get_resumes,
+                          list_resume_ids)
+from resume_cache import ResumeCache, file_content_hash
+from ingest_pool import IngestPool
+from pdf_extract import shutdown_page_pool
+from warmup import LOAD_TIMES, warm_up
+import metrics
+from ann_index import ArchiveIndex, DEFAULT_NPROBE
+from jd_catalog import JDCatalog, init_jd_tables
+from jd_import import import_jds, iter_csv_jds
+from embedding_file import EmbeddingFile
+from resume_matrix import top_k_exact, rank_exact, score_exact
+from match_store import MatchStore, init_match_tables
+from session_store import SessionStore, Workspace
 from agent_framework import AgentCoordinator
 
 app = FastAPI()
@@ -28,43 +43,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# RECRUITLY_SERVER_TIMING=1 adds a Server-Timing header with the per-stage
+# breakdown to every response; clients can also ask per request with X-Server-Timing: 1
+SERVER_TIMING = os.getenv("RECRUITLY_SERVER_TIMING", "0") == "1"
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Time every request, and report its stages in Server-Timing when enabled"""
+    start = time.perf_counter()
+    with metrics.request_timings() as timings:
+        response = await call_next(request)
+    route = request.scope.get("route")
+
+    def observe():
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            # The route template, not the path, keeps label values bounded
+            route=route.path if route is not None else "unmatched",
+            status=response.status_code
+        )
+
+    if (SERVER_TIMING or request.headers.get("x-server-timing") == "1") and timings:
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        observe()
+        return response
+
+    async def timed_body():
+        # Streaming routes (the SSE upload) do their work while the body is
+        # sent, so the request is only timed once the last chunk is out
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            observe()
+
+    response.body_iterator = timed_body()
+    return response
+
 # Initialize SQLite database
 def init_db():
-    conn = sqlite3.connect("recruitly.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS job_descriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            embedding TEXT,
-            sections TEXT,
-            summary TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS resumes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT,
-            embedding TEXT,
-            parsed TEXT,
-            summary TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS matches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            resume_id INTEGER,
-            jd_id INTEGER,
-            score REAL,
-            reasoning TEXT,
-            FOREIGN KEY (resume_id) REFERENCES resumes (id),
-            FOREIGN KEY (jd_id) REFERENCES job_descriptions (id)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with connect() as conn:
+        cursor = conn.cursor()
+        init_jd_tables(cursor)
+        init_resume_tables(cursor)
+        init_match_tables(cursor)
 
 # Call init_db on startup
 init_db()
@@ -94,24 +123,75 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return json.JSONEncoder.default(self, obj)
 
-# Store processed JD and resumes in memory for matching
-current_session = {
-    "jd": None,
-    "resumes": {},
-    "agent_coordinator": AgentCoordinator()
-}
+# The agents hold no per-recruiter state, so one coordinator serves everyone
+coordinator = AgentCoordinator()
+
+# Per-recruiter workspaces holding the current JD and uploaded resumes.
+# Embeddings live in the resume store; parsed sections are spilled there too
+# once the workspaces outgrow RECRUITLY_SESSION_MEMORY_BYTES.
+sessions = SessionStore()
+
+def get_workspace(x_workspace_id: Optional[str] = Header(None)) -> Workspace:
+    """Workspace named by the X-Workspace-Id header; clients sending none share a default one"""
+    return sessions.get(x_workspace_id)
+
+# Processed resumes keyed by PDF content hash, so re-uploads skip all parsing
+resume_cache = ResumeCache()
+
+# Every analyzed JD, with section embeddings for reverse matching
+jd_catalog = JDCatalog()
+
+# Persists match results in batched upserts
+match_store = MatchStore()
+
+# Memory-mapped section embeddings of every stored resume, shared by all workers
+embedding_file = EmbeddingFile()
+
+# Approximate nearest-neighbour index over every stored resume
+archive_index = ArchiveIndex()
+
+# Worker processes for PDF extraction and parsing (RECRUITLY_INGEST_WORKERS)
+ingest_pool = IngestPool()
+
+# Models load lazily on first use; RECRUITLY_WARMUP=1 loads them at startup instead
+WARMUP_ON_STARTUP = os.getenv("RECRUITLY_WARMUP", "0") == "1"
 
-# Create a single model instance for reuse
-model = SentenceTransformer("all-MiniLM-L6-v2")
+@app.on_event("startup")
+def warm_up_models():
+    if WARMUP_ON_STARTUP:
+        warm_up()
+
+@app.on_event("shutdown")
+def release_resources():
+    ingest_pool.shutdown()
+    shutdown_page_pool()
+    close_pools()
+
+@app.get("/health")
+def health():
+    """Report which heavy components are loaded and how long each took"""
+    return {"status": "ok", "load_times": dict(LOAD_TIMES), "sessions": sessions.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Stage latencies, document and encode counters and cache hits in Prometheus text format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/warmup")
+def warmup_models():
+    """Load all models now so the first real request doesn't pay for it"""
+    return {"load_times": warm_up()}
 
 @app.post("/embed")
-def get_embedding(request: JDRequest):
+def get_embedding(request: JDRequest, workspace: Workspace = Depends(get_workspace)):
     """Process a job description and generate its embedding"""
-    coordinator = current_session["agent_coordinator"]
     result = coordinator.process_job_description(request.text)
     
-    # Store in current session
-    current_session["jd"] = result
+    # Add to the JD catalog so it can be matched later, and keep its id
+    result["id"] = jd_catalog.add(request.text, result)
+    
+    # Store in the caller's workspace
+    workspace.set_jd(result)
     
     # Convert embedding dictionary properly for JSON response
     serializable_embedding = json.loads(
@@ -119,6 +199,7 @@ def get_embedding(request: JDRequest):
     )
     
     response_data = {
+        "id": result["id"],
         "title": result["title"],
         "embedding": serializable_embedding,
         "sections": result["sections"],
@@ -128,7 +209,7 @@ def get_embedding(request: JDRequest):
     return response_data
 
 @app.post("/upload-resumes")
-async def upload_resumes(files: List[UploadFile] = File(...)):
+async def upload_resumes(files: List[UploadFile] = File(...), workspace: Workspace = Depends(get_workspace)):
     """Process multiple resume PDFs and generate embeddings for each"""
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
@@ -138,31 +219,15 @@ async def upload_resumes(files: List[UploadFile] = File(...)):
         resume_results = {}
         
         # First save all files to disk to avoid keeping file handles open too long
-        file_paths = []
-        for file in files:
-            file_path = os.path.join(temp_dir, file.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            file_paths.append((file.filename, file_path))
+        file_paths = await run_in_threadpool(_save_uploads, files, temp_dir)
         
-        # Process files in batches to avoid memory issues
-        batch_size = 3
-        for i in range(0, len(file_paths), batch_size):
-            batch = file_paths[i:i+batch_size]
-            batch_tasks = []
-            
-            for filename, file_path in batch:
-                batch_tasks.append(process_resume(filename, file_path))
-            
-            # Process each batch concurrently
-            batch_results = await asyncio.gather(*batch_tasks)
-            
-            # Combine results
-            for filename, result in batch_results:
-                resume_results[filename] = result
-                # Add to current session
-                if "error" not in result:
-                    current_session["resumes"][filename] = result
+        # Results arrive in completion order from the ingest pool
+        async for filename, result in ingest_resumes(file_paths):
+            resume_results[filename] = result
+            # Add to the caller's workspace
+            if "error" not in result:
+                workspace.add_resume(filename, result)
+        sessions.enforce_budget()
     
     # Convert NumPy arrays to lists for JSON response
     serializable_results = json.loads(
@@ -171,66 +236,362 @@ async def upload_resumes(files: List[UploadFile] = File(...)):
     
     return JSONResponse(content=serializable_results)
 
-async def process_resume(filename, file_path):
-    """Process a single resume PDF file"""
-    try:
-        coordinator = current_session["agent_coordinator"]
-        result = coordinator.cv_agent.process_cv(file_path, filename)
-        return filename, result
-                
-    except Exception as e:
-        print(f"Error processing {filename}: {str(e)}")
-        return filename, {"error": str(e)}
+@app.post("/upload-resumes/stream")
+async def upload_resumes_stream(files: List[UploadFile] = File(...), workspace: Workspace = Depends(get_workspace)):
+    """Process resume PDFs, streaming one Server-Sent Event per finished resume.
+
+    Each "resume" event carries the filename, parsed sections, summary or
+    error, and elapsed time; a final "done" event reports the totals.
+    Embeddings and raw text are left out to keep events small.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    # Save uploads before returning; the stream outlives the request's file handles
+    temp_dir = tempfile.mkdtemp()
+    file_paths = await run_in_threadpool(_save_uploads, files, temp_dir)
+
+    async def events():
+        started = time.perf_counter()
+        processed = failed = 0
+        try:
+            async for filename, result in ingest_resumes(file_paths):
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                if "error" in result:
+                    failed += 1
+                    payload = {"filename": filename, "error": result["error"], "elapsed_ms": elapsed_ms}
+                else:
+                    processed += 1
+                    workspace.add_resume(filename, result)
+                    payload = {
+                        "filename": filename,
+                        "id": result.get("id"),
+                        "parsed": result["parsed"],
+                        "summary": result.get("summary", ""),
+                        "cached": result.get("cached", False),
+                        "elapsed_ms": elapsed_ms
+                    }
+                yield _sse_event("resume", payload)
+
+            sessions.enforce_budget()
+            yield _sse_event("done", {
+                "total": len(file_paths),
+                "processed": processed,
+                "failed": failed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, cls=NumpyEncoder)}\n\n"
+
+def _save_uploads(files, temp_dir):
+    """Write uploaded files to temp_dir, returning [(filename, path)]"""
+    file_paths = []
+    for file in files:
+        file_path = os.path.join(temp_dir, os.path.basename(file.filename))
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        file_paths.append((file.filename, file_path))
+    return file_paths
+
+async def ingest_resumes(file_paths):
+    """Yield (filename, result) for each saved resume PDF as soon as it is ready.
+
+    Cached resumes are returned straight away; the rest are parsed in the
+    ingest pool's worker processes and embedded in coalesced batches.
+    """
+    jobs = []
+    for filename, file_path in file_paths:
+        try:
+            content_hash = await run_in_threadpool(file_content_hash, file_path)
+            cached = await run_in_threadpool(resume_cache.get, content_hash)
+        except Exception as e:
+            print(f"Error processing {filename}: {str(e)}")
+            yield filename, {"error": str(e)}
+            continue
+        if cached is None:
+            jobs.append(((filename, content_hash), file_path))
+        else:
+            cached["cached"] = True
+            yield filename, await run_in_threadpool(_store_resume, filename, content_hash, cached)
+
+    async for (filename, content_hash), outcome in ingest_pool.process(jobs):
+        if isinstance(outcome, Exception):
+            print(f"Error processing {filename}: {str(outcome)}")
+            yield filename, {"error": str(outcome)}
+            continue
+        text, parsed, embeddings = outcome
+        result = coordinator.cv_agent.build_result(filename, text, parsed, embeddings)
+        await run_in_threadpool(resume_cache.put, content_hash, result)
+        result["cached"] = False
+        yield filename, await run_in_threadpool(_store_resume, filename, content_hash, result)
+
+def _store_resume(filename, content_hash, result):
+    """Attach the stored resume id, saving the resume if it is not stored yet"""
+    resume_id = find_resume_by_hash(content_hash)
+    if resume_id is None:
+        resume_id = save_resume(filename, result, content_hash=content_hash)
+    result["id"] = resume_id
+    return result
 
 @app.post("/match")
-def match_resumes():
-    """Match the current JD with all processed resumes"""
-    jd = current_session["jd"]
-    resumes = current_session["resumes"]
+def match_resumes(background_tasks: BackgroundTasks, include_stored: bool = False,
+                  top_k: Optional[int] = None, offset: int = 0, min_score: Optional[float] = None,
+                  order: str = "desc", workspace: Workspace = Depends(get_workspace)):
+    """Match the current JD with all processed resumes.
+
+    With include_stored=true every resume in the store is matched as well, so
+    an existing pool can be re-screened without re-uploading it.
+
+    Candidates are returned ranked by score (order=desc|asc), limited to
+    those scoring at least min_score, and paged with offset and top_k; total
+    is the number of candidates before paging. Every resume's score is
+    still saved. With RECRUITLY_EMBEDDING_DTYPE=float16/int8 the page is
+    re-scored in float32 (see resume_matrix.rank_exact), and so are the
+    saved scores.
+    """
+    if order not in ("desc", "asc"):
+        raise HTTPException(status_code=400, detail="order must be desc or asc")
+    if offset < 0 or (top_k is not None and top_k < 0):
+        raise HTTPException(status_code=400, detail="offset and top_k must not be negative")
 
-    if not jd or not resumes:
+    jd = workspace.jd
+    resumes = workspace.resumes()
+    if not jd or not (resumes or include_stored):
         raise HTTPException(status_code=400, detail="Job description or resumes missing")
 
-    jd_title = jd["title"]
-    jd_embeddings = jd["embedding"]
+    # Score rows of the memory-mapped embedding file rather than per-resume
+    # dicts: the workspace's resumes, or every stored resume with include_stored
+    stored = embedding_file.sync()
+    filenames = [filename for filename, data in resumes.items() if data.get("id") is not None]
+    if include_stored:
+        # Until some resume has embeddings the file has no rows; score them all as empty
+        matrix = stored if len(stored) else stored.take(list_resume_ids())
+        session_names = {resumes[filename]["id"]: filename for filename in filenames}
+    else:
+        matrix = stored.take(resumes[filename]["id"] for filename in filenames)
+    if not len(matrix):
+        raise HTTPException(status_code=400, detail="Job description or resumes missing")
+
+    # Rank all resumes, building candidates only for the requested page
+    rows, total, scores, sim_resp, sim_qual = rank_exact(
+        jd["title"], jd["embedding"], matrix, threshold=0.8,
+        top_k=top_k, offset=offset, min_score=min_score, order=order
+    )
+    page_ids = [matrix.keys[row] for row in rows]
+    if include_stored:
+        # Only the page's stored resumes are loaded, for their names
+        records = get_resumes([resume_id for resume_id in page_ids if resume_id not in session_names])
+    candidates = []
+    for row, resume_id in zip(rows, page_ids):
+        if not include_stored or resume_id in session_names:
+            key = filenames[row] if not include_stored else session_names[resume_id]
+            data = resumes[key]
+        else:
+            data = records.get(resume_id, {"id": resume_id})
+            key = data.get("filename") or str(resume_id)
+            if key in resumes:
+                key = f"{key} ({resume_id})"
+        candidates.append(build_candidate(data, key, scores[row], sim_resp[row], sim_qual[row], 0.8))
+
+    # Save every resume's score to the database after the response is sent
+    background_tasks.add_task(_save_matches, jd, matrix, scores, sim_resp, sim_qual)
+
+    return {"candidates": candidates, "total": total, "offset": offset}
+
+def _save_matches(jd, matrix, scores, sim_resp, sim_qual):
+    if matrix.quantized:
+        # Persist float32 scores, not the quantized scan's approximations
+        scores, sim_resp, sim_qual = score_exact(jd["embedding"], matrix.keys)
+    match_store.save_matches(jd.get("id"), matrix.keys, scores, sim_resp, sim_qual)
+
+@app.get("/matches/{jd_id}")
+def stored_matches(jd_id: int, threshold: float = 0.8,
+                   responsibilities_weight: float = weights["responsibilities"],
+                   qualifications_weight: float = weights["qualifications"]):
+    """Re-threshold and re-weight a JD's saved matches without re-running the matcher"""
+    candidates = match_store.rescore(jd_id, threshold, responsibilities_weight, qualifications_weight)
+    if not candidates:
+        raise HTTPException(status_code=404, detail=f"No saved matches for job description {jd_id}")
+    return {"jd_id": jd_id, "candidates": candidates}
+
+@app.post("/match/archive")
+def match_archive(background_tasks: BackgroundTasks, top_k: int = 20, nprobe: int = DEFAULT_NPROBE,
+                  workspace: Workspace = Depends(get_workspace)):
+    """Find the best stored resumes for the current JD across the whole archive.
+
+    Uses the approximate archive index for retrieval and re-scores the
+    shortlist exactly, so scores agree with /match. When enough new resumes
+    have accumulated, the index is re-clustered after the response is sent.
+    """
+    jd = workspace.jd
+    if not jd:
+        raise HTTPException(status_code=400, detail="Job description missing")
+    if top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
+    if nprobe < 1:
+        raise HTTPException(status_code=400, detail="nprobe must be at least 1")
+
+    candidates = archive_index.search(jd["title"], jd["embedding"], top_k=top_k, nprobe=nprobe)
+    if archive_index.rebuild_due():
+        background_tasks.add_task(archive_index.rebuild_if_due)
+    return {"candidates": candidates, "archive_size": len(archive_index)}
+
+@app.post("/archive-index/rebuild")
+def rebuild_archive_index():
+    """Re-cluster the archive index over every stored resume"""
+    archive_index.sync()
+    archive_index.rebuild()
+    return {"archive_size": len(archive_index)}
+
+# Largest score matrix (JDs x resumes) /match/matrix serializes as JSON;
+# bigger requests must page with tile or use format=npz
+JSON_MATRIX_MAX_CELLS = int(os.getenv("RECRUITLY_JSON_MATRIX_MAX_CELLS", str(1_000_000)))
+
+@app.post("/match/matrix")
+def match_matrix(format: str = "npz", top_k: Optional[int] = None,
+                 tile: Optional[int] = None, tile_size: int = 8192):
+    """Score every cataloged JD against every stored resume.
 
-    # Match all resumes
-    all_candidates = match_all_resumes(jd_title, jd_embeddings, resumes, threshold=0.8)
+    - top_k: JSON with the best k resumes per JD (never builds the full matrix)
+    - format=npz: the matrix (or one column tile) as a binary .npz holding
+      jd_ids, resume_ids and float32 scores
+    - format=json: the same as nested lists, up to
+      RECRUITLY_JSON_MATRIX_MAX_CELLS scores; larger pools need tile
 
-    # Save all candidates to the database
-    conn = sqlite3.connect("recruitly.db")
-    cursor = conn.cursor()
-    for candidate in all_candidates:
-        cursor.execute("""
-            INSERT INTO matches (resume_id, jd_id, score, reasoning)
-            VALUES (?, ?, ?, ?)
-        """, (candidate.get("resume_id"), jd.get("id"), candidate["score"], json.dumps(candidate["reasoning"])))
-    conn.commit()
-    conn.close()
+    With RECRUITLY_EMBEDDING_DTYPE=float16/int8, top_k scores are still
+    exact (the shortlist is re-scored in float32); full matrices are not.
+    """
+    if format not in ("npz", "json"):
+        raise HTTPException(status_code=400, detail="format must be npz or json")
+    if tile_size < 1:
+        raise HTTPException(status_code=400, detail="tile_size must be at least 1")
+    if tile is not None and tile < 0:
+        raise HTTPException(status_code=400, detail="tile must not be negative")
 
-    # Include all candidates in the response
-    return {"candidates": all_candidates}
+    packed_jds = jd_catalog.packed()
+    # Memory-mapped, pre-normalized resume sides, decoded one tile at a time
+    packed_resumes = embedding_file.sync()
+    if not len(packed_jds) or not len(packed_resumes):
+        raise HTTPException(status_code=400, detail="Job catalog or resume store is empty")
+    if tile is not None and tile * tile_size >= len(packed_resumes):
+        raise HTTPException(status_code=400, detail=f"tile must be below {-(-len(packed_resumes) // tile_size)}")
+
+    if top_k is not None:
+        indices, scores = top_k_exact(packed_jds, packed_resumes, max(top_k, 1), tile_size)
+        return {
+            "top_k": {
+                str(jd_id): [
+                    {"resume_id": packed_resumes.keys[i], "score": round(float(score), 3)}
+                    for i, score in zip(indices[row], scores[row])
+                ]
+                for row, jd_id in enumerate(packed_jds.keys)
+            }
+        }
+
+    columns = len(packed_resumes) if tile is None else min(tile_size, len(packed_resumes) - tile * tile_size)
+    if format == "json" and len(packed_jds) * columns > JSON_MATRIX_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"JSON matrices are limited to {JSON_MATRIX_MAX_CELLS} scores; use tile or format=npz"
+        )
+
+    if tile is not None:
+        start = tile * tile_size
+        packed_resumes = packed_resumes.slice(start, start + tile_size)
+    scores = score_matrix(packed_jds, packed_resumes, tile_size)
+
+    if format == "json":
+        return {
+            "jd_ids": packed_jds.keys,
+            "resume_ids": packed_resumes.keys,
+            "scores": np.round(scores, 3).tolist()
+        }
+
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        jd_ids=np.asarray(packed_jds.keys, dtype=np.int64),
+        resume_ids=np.asarray(packed_resumes.keys, dtype=np.int64),
+        scores=scores
+    )
+    return Response(
+        content=buffer.getvalue(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": "attachment; filename=score_matrix.npz"}
+    )
+
+@app.get("/jobs")
+def list_jobs():
+    """List every job description in the catalog"""
+    return {"jobs": jd_catalog.list()}
+
+@app.post("/jobs/import")
+def import_jobs(file: UploadFile = File(...)):
+    """Bulk-import job descriptions from a CSV with title and description columns"""
+    counts = import_jds(iter_csv_jds(file.file), jd_catalog)
+    return {**counts, "catalog_size": len(jd_catalog.packed())}
+
+@app.post("/match/jobs")
+async def match_jobs(file: UploadFile = File(...), top_k: Optional[int] = None):
+    """Rank every cataloged job description for a single uploaded resume"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = await run_in_threadpool(_save_uploads, [file], temp_dir)
+        results = [result async for _, result in ingest_resumes(file_paths)]
+    result = results[0]
+    if "error" in result:
+        raise HTTPException(status_code=422, detail=result["error"])
+
+    # Loading the catalog (from SQLite when cold) and scoring would block the event loop
+    jobs = await run_in_threadpool(_rank_jobs, result["embedding"], top_k)
+    return {
+        "resume_id": result.get("id"),
+        "filename": file.filename,
+        "summary": result.get("summary", ""),
+        "jobs": jobs
+    }
+
+def _rank_jobs(resume_embeddings, top_k):
+    packed_jds = jd_catalog.packed()
+    scores, sim_resp, sim_qual = score_jds_for_resume(resume_embeddings, packed_jds)
+    order = np.argsort(-scores, kind="stable")
+    if top_k is not None:
+        order = order[:max(top_k, 0)]
+    return [
+        {
+            "jd_id": packed_jds.keys[row],
+            "title": jd_catalog.title(packed_jds.keys[row]),
+            "score": round(float(scores[row]), 3),
+            "reasoning": explain_match(float(sim_resp[row]), float(sim_qual[row]))
+        }
+        for row in order
+    ]
 
 @app.post("/generate-interview-slots")
 def generate_interview_slots():
     """Generate potential interview time slots"""
-    if not current_session["agent_coordinator"]:
-        raise HTTPException(status_code=400, detail="Agent coordinator not initialized")
-    
-    slots = current_session["agent_coordinator"].scheduler_agent.generate_interview_slots()
+    slots = coordinator.scheduler_agent.generate_interview_slots()
     
     return {"slots": slots}
 
 @app.post("/prepare-interview-email/{candidate_id}")
-def prepare_interview_email(candidate_id: str):
+def prepare_interview_email(candidate_id: str, workspace: Workspace = Depends(get_workspace)):
     """Prepare an interview email for a specific candidate"""
-    if not current_session["jd"]:
+    if not workspace.jd:
         raise HTTPException(status_code=400, detail="No job description processed")
     
     # Find the candidate in the matches
     matched_candidates = []
-    if "matches" in current_session:
-        matched_candidates = current_session["matches"]["matches"]
+    if workspace.matches:
+        matched_candidates = workspace.matches["matches"]
     
     candidate = None
     for match in matched_candidates:
@@ -242,9 +603,9 @@ def prepare_interview_email(candidate_id: str):
         raise HTTPException(status_code=404, detail=f"Candidate {candidate_id} not found")
     
     # Generate email content
-    email_data = current_session["agent_coordinator"].scheduler_agent.prepare_email_for_candidate(
+    email_data = coordinator.scheduler_agent.prepare_email_for_candidate(
         candidate,
-        current_session["jd"]["title"]
+        workspace.jd["title"]
     )
     
     return email_data
@@ -269,7 +630,6 @@ def send_candidate_email(request: EmailRequest):
 @app.get("/suggest-interview-times/{candidate_id}")
 def suggest_interview_times(candidate_id: str):
     """Suggest available interview time slots for a candidate"""
-    coordinator = current_session["agent_coordinator"]
     slots = coordinator.scheduler_agent.generate_interview_slots(days_ahead=7, slots_per_day=3)
     
     return {"candidate_id": candidate_id, "slots": slots}
@@ -281,20 +641,31 @@ def _extract_name(parsed, fallback):
     return Path(fallback).stem
 
 @app.get("/clear-session")
-def clear_session():
-    """Clear the current session data"""
-    current_session["jd"] = None
-    current_session["resumes"] = {}
+def clear_session(workspace: Workspace = Depends(get_workspace)):
+    """Clear the caller's workspace"""
+    workspace.clear()
     return {"message": "Session cleared"}
 
+@app.post("/workspaces")
+def create_workspace():
+    """Open a new workspace; send its id as X-Workspace-Id on later requests"""
+    return {"workspace_id": sessions.create().id}
+
+@app.delete("/workspaces/{workspace_id}")
+def delete_workspace(workspace_id: str):
+    """Drop a workspace and everything it holds in memory"""
+    if not sessions.delete(workspace_id):
+        raise HTTPException(status_code=404, detail=f"Workspace {workspace_id} not found")
+    return {"message": "Workspace deleted"}
+
 @app.get("/test-match")
 def test_match():
     """Test endpoint to diagnose matching issues"""
     test_jd = """We are seeking an innovative and strategic Product Manager to lead the development and execution of new products. The ideal candidate will collaborate with cross-functional teams to define product roadmaps, analyze market trends, and ensure successful product launches. Responsibilities: Define product vision and strategy based on market research and customer needs. Work closely with engineering, design, and marketing teams to develop and launch products. Prioritize features, create roadmaps, and manage product lifecycle. Analyze user feedback and data to optimize product performance. Ensure alignment between business goals and product development. Qualifications: Bachelor's degree in Business, Computer Science, or a related field. Experience in product management, agile methodologies, and market research. Strong analytical, leadership, and communication skills. Familiarity with project management tools and data-driven decision-making."""
     
     # Process the test JD
-    title, embedding = generate_jd_embedding(test_jd)
-    sections = extract_sections(test_jd)
+    analysis = analyze_jd_text(test_jd)
+    sections = analysis["sections"]
     
     # Create a simple test resume with matching sections
     test_resume = {
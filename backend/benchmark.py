@@ -0,0 +1,475 @@
+"""Reproducible benchmarks of the resume/JD pipeline.
+
+Usage:
+  python benchmark.py corpus [--dataset DIR] [--limit N] [--output corpus.json]
+  python benchmark.py scale --resumes 10000 100000 [--dtype int8] [--random DIM] [--output scale.json]
+  python benchmark.py compare baseline.json candidate.json [--tolerance 0.1]
+
+corpus runs the bundled dataset (job_description.csv and CVs1/*.pdf) through
+every stage: PDF extraction, section parsing, line classification, name
+extraction, embedding and matching. scale replicates the corpus embeddings
+(with a little noise) into a fresh resume store of each requested size, then
+times storage writes, the memory-mapped embedding file and top-k matching.
+Both write JSON with throughput, p50/p95/max latency and peak RSS per stage;
+compare prints the change between two such files and exits non-zero when a
+stage regressed by more than the tolerance.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+import metrics
+
+DATASET_ROOT = Path(__file__).resolve().parent.parent / "Dataset"
+# Scores per JD kept by the matching stages, as in /match/matrix
+TOP_K = 10
+# Seed rows for --random, about the size of the bundled corpus
+RANDOM_SEED_RESUMES = 200
+# Relative change in a stage's throughput, latency or RSS counted as a regression
+DEFAULT_TOLERANCE = 0.10
+# Bigger is better for these fields; the rest are costs
+HIGHER_IS_BETTER = {"throughput_per_second"}
+COMPARED_FIELDS = ("throughput_per_second", "p50_ms", "p95_ms", "peak_rss_bytes")
+
+def find_dataset(root: Path = DATASET_ROOT) -> Optional[Path]:
+    """Directory holding job_description.csv and CVs1/ (its name has odd characters, so search)"""
+    for csv_path in sorted(root.glob("**/job_description.csv")):
+        if (csv_path.parent / "CVs1").is_dir():
+            return csv_path.parent
+    return None
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+class StageTimer:
+    """Per-stage latency samples, with the number of items each sample covered.
+
+    peak_rss_bytes of a stage is the process peak when it last ran, so it
+    only grows from stage to stage; run a mode on its own to isolate it.
+    """
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.items: Dict[str, List[int]] = {}
+        self.units: Dict[str, str] = {}
+        self.rss: Dict[str, Optional[int]] = {}
+
+    def add(self, stage: str, seconds: float, items: int = 1, unit: str = "document"):
+        self.samples.setdefault(stage, []).append(seconds)
+        self.items.setdefault(stage, []).append(items)
+        self.units[stage] = unit
+        self.rss[stage] = peak_rss_bytes()
+
+    @contextlib.contextmanager
+    def time(self, stage: str, items: int = 1, unit: str = "document", breakdown: bool = True):
+        """Time the block as one sample of stage, plus (with breakdown) the metrics stages it ran"""
+        with metrics.capture() as events:
+            start = time.perf_counter()
+            yield
+            elapsed = time.perf_counter() - start
+        self.add(stage, elapsed, items, unit)
+        if not breakdown:
+            return
+        nested = {}
+        for name, label_values, value in events:
+            if name == metrics.STAGE_SECONDS.name:
+                nested[label_values[0]] = nested.get(label_values[0], 0.0) + value
+        for name, seconds in nested.items():
+            if name != stage:
+                self.add(name, seconds, items, unit)
+
+    def summary(self) -> Dict[str, Dict]:
+        stages = {}
+        for stage, samples in self.samples.items():
+            latencies = np.asarray(samples) * 1000
+            total = float(np.sum(samples))
+            items = int(sum(self.items[stage]))
+            stages[stage] = {
+                "unit": self.units[stage],
+                "samples": len(samples),
+                "items": items,
+                "total_seconds": round(total, 6),
+                "throughput_per_second": round(items / total, 3) if total > 0 else None,
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                "max_ms": round(float(latencies.max()), 3),
+                "peak_rss_bytes": self.rss[stage]
+            }
+        return stages
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _environment(mode: str, params: Dict) -> Dict:
+    from embedding_service import MODEL_NAME
+    return {
+        "mode": mode,
+        "params": params,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "model": MODEL_NAME
+    }
+
+# --- Corpus mode ---
+
+def _load_corpus(dataset: Path, limit: Optional[int], jd_limit: Optional[int]):
+    from jd_import import iter_csv_jds
+    with open(dataset / "job_description.csv", "rb") as f:
+        jds = list(iter_csv_jds(f))[:jd_limit]
+    pdfs = sorted((dataset / "CVs1").glob("*.pdf"))[:limit]
+    return jds, pdfs
+
+def run_corpus(dataset: Path, limit: Optional[int] = None, jd_limit: Optional[int] = None,
+               embed_batch: Optional[int] = None) -> Dict:
+    """Time every pipeline stage over the bundled JDs and resumes"""
+    from warmup import warm_up
+    from ingest_pool import EMBED_BATCH_RESUMES
+    from jd_embedding_utils import extract_sections, embed_jd_sections_batch
+    from resume_embedding_utils import pdf_to_text, extract_resume_sections, embed_resume_sections_batch
+    from matcher import rank_resumes, pack_jd_embeddings, pack_resume_embeddings, top_k_per_jd
+
+    embed_batch = embed_batch or EMBED_BATCH_RESUMES
+    jds, pdfs = _load_corpus(dataset, limit, jd_limit)
+    timer = StageTimer()
+    # Models load before any stage is timed; load times are reported on their own
+    load_times = warm_up()
+
+    jd_data = {}
+    for title, text in jds:
+        with timer.time("jd_parse"):
+            sections = extract_sections(text)
+        if title:
+            sections["job_title"] = title
+        with timer.time("jd_embed"):
+            embedding = embed_jd_sections_batch([sections])[0]
+        jd_data[f"jd-{len(jd_data)}"] = {"title": sections["job_title"], "embedding": embedding}
+
+    texts, parsed, failures = {}, {}, 0
+    for pdf in pdfs:
+        try:
+            with timer.time("pdf_extract"):
+                texts[pdf.name] = pdf_to_text(str(pdf))
+        except Exception:
+            failures += 1
+            continue
+        with timer.time("resume_parse"):
+            parsed[pdf.name] = extract_resume_sections(texts[pdf.name])
+
+    names = list(parsed)
+    resume_data = {}
+    for start in range(0, len(names), embed_batch):
+        batch = names[start:start + embed_batch]
+        with timer.time("resume_embed", items=len(batch), unit="resume"):
+            embeddings = embed_resume_sections_batch([parsed[name] for name in batch])
+        for name, embedding in zip(batch, embeddings):
+            resume_data[name] = {"parsed": parsed[name], "embedding": embedding}
+
+    if resume_data:
+        for jd in jd_data.values():
+            with timer.time("match", items=len(resume_data), unit="resume"):
+                rank_resumes(jd["title"], jd["embedding"], resume_data, top_k=TOP_K)
+        with timer.time("match_matrix", items=len(jd_data) * len(resume_data), unit="pair"):
+            top_k_per_jd(pack_jd_embeddings(jd_data), pack_resume_embeddings(resume_data), TOP_K)
+
+    return {
+        "environment": _environment("corpus", {
+            "dataset": str(dataset), "jds": len(jds), "resumes": len(pdfs),
+            "failed_pdfs": failures, "embed_batch": embed_batch
+        }),
+        "load_times": load_times,
+        "stages": timer.summary(),
+        "peak_rss_bytes": peak_rss_bytes()
+    }
+
+# --- Synthetic scale mode ---
+
+def _corpus_embeddings(dataset: Path, limit: Optional[int]):
+    """Section embeddings of the bundled resumes and JDs, as the seed for replication"""
+    from warmup import warm_up
+    from jd_embedding_utils import analyze_jd_text
+    from resume_embedding_utils import pdf_to_text, extract_resume_sections, embed_resume_sections_batch
+
+    warm_up()
+    jds, pdfs = _load_corpus(dataset, limit, None)
+    parsed = []
+    for pdf in pdfs:
+        try:
+            parsed.append(extract_resume_sections(pdf_to_text(str(pdf))))
+        except Exception:
+            continue
+    embeddings = embed_resume_sections_batch(parsed)
+    seed = _section_seed(embeddings)
+    jd_data = {f"jd-{i}": {"embedding": analyze_jd_text(text)["embedding"]} for i, (_, text) in enumerate(jds)}
+    return seed, jd_data
+
+def _section_seed(embeddings):
+    """(vectors, presence) seed arrays from a list of {section: vector}.
+
+    vectors is (N, len(EMBEDDED_SECTIONS), dim) with absent sections zeroed;
+    bit i of presence marks EMBEDDED_SECTIONS[i].
+    """
+    from resume_embedding_utils import EMBEDDED_SECTIONS
+
+    dim = next((len(vec) for emb in embeddings for vec in emb.values() if vec is not None), 0)
+    vectors = np.zeros((len(embeddings), len(EMBEDDED_SECTIONS), dim), dtype=np.float32)
+    presence = np.zeros(len(embeddings), dtype=np.uint8)
+    for row, embedding in enumerate(embeddings):
+        for column, section in enumerate(EMBEDDED_SECTIONS):
+            if embedding.get(section) is not None:
+                vectors[row, column] = embedding[section]
+                presence[row] |= 1 << column
+    return vectors, presence
+
+def _random_embeddings(jds: int, dim: int, rng):
+    """Random unit vectors standing in for the corpus when the models aren't wanted"""
+    from resume_embedding_utils import EMBEDDED_SECTIONS
+
+    sections = len(EMBEDDED_SECTIONS)
+    vectors = rng.standard_normal((RANDOM_SEED_RESUMES, sections, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=-1, keepdims=True)
+    presence = rng.integers(1, 1 << sections, size=RANDOM_SEED_RESUMES).astype(np.uint8)
+    vectors *= ((presence[:, None] >> np.arange(sections)) & 1)[..., None]
+    seed = vectors, presence
+    jd_vectors = rng.standard_normal((jds, 2, dim)).astype(np.float32)
+    jd_data = {
+        f"jd-{i}": {"embedding": {"responsibilities": jd_vectors[i, 0], "qualifications": jd_vectors[i, 1]}}
+        for i in range(jds)
+    }
+    return seed, jd_data
+
+def _replicate(seed, start: int, stop: int, noise: float, rng):
+    """Rows start:stop of the synthetic corpus: seed rows cycled, with gaussian noise on present sections"""
+    seed_vectors, seed_presence = seed
+    rows = np.arange(start, stop) % len(seed_presence)
+    presence = seed_presence[rows]
+    vectors = seed_vectors[rows]
+    mask = ((presence[:, None] >> np.arange(vectors.shape[1])) & 1)[..., None].astype(np.float32)
+    vectors = vectors + rng.standard_normal(vectors.shape, dtype=np.float32) * noise * mask
+    return vectors, presence
+
+def _write_store(db_path: str, seed, count: int, noise: float, rng, timer: StageTimer, batch: int):
+    from database import connect
+    from resume_embedding_utils import EMBEDDED_SECTIONS
+    from resume_store import init_resume_tables, vector_to_blob
+
+    with connect(db_path) as conn:
+        init_resume_tables(conn.cursor())
+    sections = EMBEDDED_SECTIONS
+    for start in range(0, count, batch):
+        stop = min(start + batch, count)
+        vectors, presence = _replicate(seed, start, stop, noise, rng)
+        with timer.time("store_write", items=stop - start, unit="resume"), connect(db_path) as conn:
+            conn.executemany(
+                "INSERT INTO resumes (id, filename, parsed, summary, content_hash) VALUES (?, ?, '{}', '', NULL)",
+                [(start + i + 1, f"synthetic-{start + i + 1}.pdf") for i in range(stop - start)]
+            )
+            conn.executemany(
+                "INSERT INTO resume_embeddings (resume_id, section, vector) VALUES (?, ?, ?)",
+                [
+                    (start + i + 1, section, vector_to_blob(vectors[i, column]))
+                    for i in range(stop - start)
+                    for column, section in enumerate(sections)
+                    if presence[i] & (1 << column)
+                ]
+            )
+
+def run_scale(sizes: List[int], dtype: str = "float32", dataset: Optional[Path] = None,
+              limit: Optional[int] = None, random_dim: Optional[int] = None, jds: int = 20,
+              noise: float = 0.02, queries: int = 20, batch: int = 10000, tile: int = 8192,
+              workdir: Optional[str] = None, keep: bool = False, seed: int = 0) -> Dict:
+    """Replicate the corpus to each size and time storage and matching at that scale"""
+    from embedding_file import EmbeddingFile
+    from matcher import pack_jd_embeddings
+    from resume_matrix import ResumeMatrix, top_k_exact
+
+    rng = np.random.default_rng(seed)
+    if random_dim:
+        seed_sections, jd_data = _random_embeddings(jds, random_dim, rng)
+    else:
+        seed_sections, jd_data = _corpus_embeddings(dataset, limit)
+    packed_jds = pack_jd_embeddings(jd_data)
+    timer = StageTimer()
+    storage = {}
+
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix=f"recruitly-bench-{size}-", dir=workdir)
+        db_path = os.path.join(directory, "bench.db")
+        try:
+            _write_store(db_path, seed_sections, size, noise, rng, timer, batch)
+            path = os.path.join(directory, "embeddings.bin")
+            with timer.time(f"embedding_file_sync@{size}", items=size, unit="resume", breakdown=False):
+                EmbeddingFile(path, db_path=db_path, dtype=dtype).sync(batch)
+            # A fresh instance, as a newly started worker would open it
+            with timer.time(f"embedding_file_open@{size}", breakdown=False):
+                matrix = EmbeddingFile(path, db_path=db_path, dtype=dtype).matrix()
+            loaded = min(size, batch)
+            with timer.time(f"from_store@{loaded}", items=loaded, unit="resume", breakdown=False):
+                ResumeMatrix.from_store(matrix.ids[:loaded].tolist(), db_path=db_path)
+
+            # One JD at a time, as a single /match query sees it
+            for row in range(min(queries, len(packed_jds))):
+                with timer.time(f"match_topk@{size}", items=size, unit="resume", breakdown=False):
+                    top_k_exact(packed_jds.slice(row, row + 1), matrix, TOP_K, tile, db_path=db_path)
+            # Every JD at once, as /match/matrix does
+            with timer.time(f"match_matrix@{size}", items=size * len(packed_jds), unit="pair", breakdown=False):
+                top_k_exact(packed_jds, matrix, TOP_K, tile, db_path=db_path)
+            storage[size] = {
+                "embedding_file_bytes": os.path.getsize(path) + os.path.getsize(f"{path}.idx"),
+                "database_bytes": os.path.getsize(db_path)
+            }
+        finally:
+            matrix = None
+            if not keep:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "environment": _environment("scale", {
+            "sizes": sizes, "dtype": dtype, "seed_resumes": len(seed_sections[1]), "jds": len(packed_jds),
+            "random_dim": random_dim, "noise": noise, "queries": queries, "batch": batch, "tile": tile,
+            "seed": seed
+        }),
+        "stages": timer.summary(),
+        "storage": storage,
+        "peak_rss_bytes": peak_rss_bytes()
+    }
+
+# --- Comparison ---
+
+def compare(baseline: Dict, candidate: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """Relative change of every compared field of the stages both runs share"""
+    rows = []
+    for stage, before in baseline.get("stages", {}).items():
+        after = candidate.get("stages", {}).get(stage)
+        if after is None:
+            continue
+        for field in COMPARED_FIELDS:
+            old, new = before.get(field), after.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if field in HIGHER_IS_BETTER else change
+            rows.append({
+                "stage": stage, "field": field, "baseline": old, "candidate": new,
+                "change": round(change, 4), "regression": worse > tolerance
+            })
+    return rows
+
+def _print_stages(stages: Dict[str, Dict], out):
+    writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+    writer.writerow(["stage", "items", "per_second", "p50_ms", "p95_ms", "max_ms"])
+    for stage, stats in stages.items():
+        writer.writerow([stage, stats["items"], stats["throughput_per_second"],
+                         stats["p50_ms"], stats["p95_ms"], stats["max_ms"]])
+
+def _print_comparison(rows: List[Dict], out):
+    writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+    writer.writerow(["stage", "field", "baseline", "candidate", "change", ""])
+    for row in rows:
+        writer.writerow([row["stage"], row["field"], row["baseline"], row["candidate"],
+                         f"{row['change'] * 100:+.1f}%", "REGRESSION" if row["regression"] else ""])
+
+def _write(result: Dict, output: Optional[str]):
+    if output:
+        with open(output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote {output}")
+    _print_stages(result["stages"], sys.stdout)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Recruitly pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    corpus = commands.add_parser("corpus", help="Time every stage over the bundled dataset")
+    corpus.add_argument("--dataset", type=Path, help="Directory with job_description.csv and CVs1/")
+    corpus.add_argument("--limit", type=int, help="Only the first N resumes")
+    corpus.add_argument("--jds", type=int, help="Only the first N job descriptions")
+    corpus.add_argument("--embed-batch", type=int, help="Resumes per embedding call")
+    corpus.add_argument("--output", default="benchmark-corpus.json")
+    corpus.add_argument("--verbose", action="store_true", help="Keep the pipeline's own progress output")
+
+    scale = commands.add_parser("scale", help="Time storage and matching on a replicated corpus")
+    scale.add_argument("--resumes", type=int, nargs="+", default=[10000], help="Corpus sizes, e.g. 10000 100000 1000000")
+    scale.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32")
+    scale.add_argument("--dataset", type=Path)
+    scale.add_argument("--limit", type=int, help="Seed with only the first N resumes")
+    scale.add_argument("--random", type=int, metavar="DIM", help="Seed with random DIM-wide vectors instead of the corpus (no models needed)")
+    scale.add_argument("--jds", type=int, default=20, help="Job descriptions when seeding with --random")
+    scale.add_argument("--noise", type=float, default=0.02)
+    scale.add_argument("--queries", type=int, default=20, help="Single-JD top-k queries per size")
+    scale.add_argument("--batch", type=int, default=10000, help="Resumes per store write and file sync batch")
+    scale.add_argument("--tile", type=int, default=8192)
+    scale.add_argument("--workdir", help="Where the temporary stores are created")
+    scale.add_argument("--keep", action="store_true", help="Keep the temporary stores")
+    scale.add_argument("--seed", type=int, default=0)
+    scale.add_argument("--output", default="benchmark-scale.json")
+    scale.add_argument("--verbose", action="store_true")
+
+    comparison = commands.add_parser("compare", help="Compare two benchmark JSON files")
+    comparison.add_argument("baseline")
+    comparison.add_argument("candidate")
+    comparison.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    comparison.add_argument("--output", help="Also write the comparison as JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        rows = compare(baseline, candidate, args.tolerance)
+        _print_comparison(rows, sys.stdout)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(rows, f, indent=2)
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    dataset = args.dataset or find_dataset()
+    if dataset is None and not getattr(args, "random", None):
+        parser.error(f"No dataset found under {DATASET_ROOT}; pass --dataset")
+
+    # The pipeline prints per-document progress; keep it out of the report unless asked
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        if args.command == "corpus":
+            result = run_corpus(dataset, args.limit, args.jds, args.embed_batch)
+        else:
+            result = run_scale(args.resumes, args.dtype, dataset, args.limit, args.random, args.jds,
+                               args.noise, args.queries, args.batch, args.tile, args.workdir, args.keep,
+                               args.seed)
+    _write(result, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
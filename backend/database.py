@@ -1,19 +1,109 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./application_db.sqlite"
+DB_PATH = os.getenv("RECRUITLY_DB", "recruitly.db")
+# Connections kept open per database file
+POOL_SIZE = int(os.getenv("RECRUITLY_DB_POOL_SIZE", "8"))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Applied to every new connection. WAL lets readers proceed while a writer
+# commits, and busy_timeout waits out a competing writer instead of failing.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all request threads.
+
+    A connection is used by one thread at a time but may move between the
+    threads of FastAPI's threadpool, so it is opened with
+    check_same_thread=False. When every connection is checked out, callers
+    block until one is returned.
+    """
+    def __init__(self, db_path: str = DB_PATH, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commits on success and rolls back on error"""
+        conn = self.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str = DB_PATH) -> ConnectionPool:
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
+
+def connect(db_path: str = DB_PATH):
+    """Pooled connection for db_path, used as `with connect() as conn:`"""
+    return get_pool(db_path).connection()
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
 
 def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    """FastAPI dependency yielding a pooled connection for the request"""
+    with connect() as conn:
+        yield conn
@@ -0,0 +1,209 @@
+import os
+import struct
+import threading
+from typing import Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+from database import DB_PATH
+from embedding_service import MODEL_NAME
+from resume_matrix import ResumeMatrix, quantize_vectors
+from resume_store import list_resume_ids
+
+EMBEDDING_FILE_PATH = os.getenv("RECRUITLY_EMBEDDING_FILE", ".cache/resume_embeddings.bin")
+# float32, or float16 / int8 to cut the file 2-4x. A storage-size option
+# only: scans are slower than float32, and resume_matrix.top_k_exact /
+# rank_exact re-score the shortlist so scores stay exact
+EMBEDDING_DTYPE = os.getenv("RECRUITLY_EMBEDDING_DTYPE", "float32")
+
+# On-disk element type per storage mode
+STORAGE_CODES = {"float32": "<f4", "float16": "<f2", "int8": "i1"}
+
+MAGIC = b"RCRTEMB\0"
+FORMAT_VERSION = 2
+# magic, version, sides, dim, count, dtype, model name, side layout
+_HEADER = struct.Struct("<8sIIIQ16s256s256s")
+# Rows start on a page boundary so the data maps cleanly
+HEADER_SIZE = 4096
+# One index entry per row, in row order
+INDEX_DTYPE = np.dtype([("id", "<i8"), ("presence", "u1")])
+
+def _layout():
+    # Side layout as recorded in the header, e.g. "experience+projects,education+..."
+    return ["+".join(sections) for sections in ResumeMatrix.sides]
+
+class EmbeddingFile:
+    """Match-ready resume vectors in a flat, memory-mapped binary file.
+
+    The file is a fixed header recording the format version, embedding
+    model, dim, side layout and storage type, followed by one (2 x dim)
+    block per resume holding its normalized responsibility and
+    qualification sides (see ResumeMatrix): float32, float16, or int8
+    followed by one float32 scale per side. The sides are computed from the
+    section embeddings once, when sync() appends a resume, so queries only
+    decode and multiply. A sibling .idx file holds each row's resume id and
+    side presence bits. Rows are only ever appended in ascending id
+    order, and the header's row count is written last, so readers never
+    see a partial row.
+
+    Opening the file maps it rather than reading it, so startup is constant
+    time and every worker process mapping the same file shares its pages.
+    A file written by another format version, model, side layout or
+    storage type is rebuilt from the resume store.
+    """
+    def __init__(self, path: str = EMBEDDING_FILE_PATH, db_path: str = DB_PATH, model_name: str = MODEL_NAME,
+                 dtype: str = EMBEDDING_DTYPE):
+        if dtype not in STORAGE_CODES:
+            raise ValueError(f"Unsupported embedding dtype {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self.index_path = f"{path}.idx"
+        self.db_path = db_path
+        self.model_name = model_name
+        self.layout = _layout()
+        self._lock = threading.Lock()
+        self._matrix = None
+
+    def _read_header(self) -> Optional[dict]:
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read(_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(raw) < _HEADER.size:
+            return None
+        magic, version, sides, dim, count, dtype, model, layout = _HEADER.unpack(raw)
+        if magic != MAGIC:
+            return None
+        return {
+            "version": version,
+            "sides": sides,
+            "dim": dim,
+            "count": count,
+            "dtype": dtype.rstrip(b"\0").decode(),
+            "model": model.rstrip(b"\0").decode(),
+            "layout": layout.rstrip(b"\0").decode().split(",")
+        }
+
+    def _write_header(self, f, dim: int, count: int):
+        f.seek(0)
+        f.write(_HEADER.pack(
+            MAGIC, FORMAT_VERSION, len(self.layout), dim, count, STORAGE_CODES[self.dtype].encode(),
+            self.model_name.encode()[:256], ",".join(self.layout).encode()[:256]
+        ))
+
+    def _compatible(self, header: Optional[dict]) -> bool:
+        return (
+            header is not None
+            and header["version"] == FORMAT_VERSION
+            and header["model"] == self.model_name
+            and header["layout"] == self.layout
+            and header["dtype"] == STORAGE_CODES[self.dtype]
+        )
+
+    def _row_dtype(self, dim: int) -> np.dtype:
+        fields = [("vectors", STORAGE_CODES[self.dtype], (len(self.layout), dim))]
+        if self.dtype == "int8":
+            fields.append(("scales", "<f4", (len(self.layout),)))
+        return np.dtype(fields)
+
+    def _create(self, dim: int):
+        # Replace rather than truncate: other processes may still map the old file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.index_path}.tmp", "wb"):
+            pass
+        with open(f"{self.path}.tmp", "wb") as f:
+            self._write_header(f, dim, 0)
+            f.write(b"\0" * (HEADER_SIZE - _HEADER.size))
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def matrix(self) -> ResumeMatrix:
+        """The stored rows as a ResumeMatrix backed by read-only memory maps"""
+        header = self._read_header()
+        if not self._compatible(header) or header["count"] == 0:
+            return ResumeMatrix(
+                np.zeros(0, dtype=np.int64),
+                np.zeros((0, len(self.layout), header["dim"] if header else 0), dtype=np.float32),
+                np.zeros(0, dtype=np.uint8)
+            )
+        with self._lock:
+            if self._matrix is not None and len(self._matrix) == header["count"]:
+                return self._matrix
+            count, dim = header["count"], header["dim"]
+            rows = np.memmap(self.path, dtype=self._row_dtype(dim), mode="r", offset=HEADER_SIZE, shape=(count,))
+            index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+            scales = rows["scales"] if self.dtype == "int8" else None
+            self._matrix = ResumeMatrix(index["id"], rows["vectors"], index["presence"], scales=scales)
+            return self._matrix
+
+    def sync(self, batch: int = 10000) -> ResumeMatrix:
+        """Append resumes stored since the last sync, then return the mapped matrix"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            # Serializes writers across worker processes sharing the file
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            header = self._read_header()
+            if not self._compatible(header):
+                header = None
+            new_ids = list_resume_ids(self._last_id(header), self.db_path)
+            pending = []
+            for i in range(0, len(new_ids), batch):
+                chunk_ids = pending + new_ids[i:i + batch]
+                chunk = ResumeMatrix.from_store(chunk_ids, db_path=self.db_path)
+                if chunk.dim == 0 and header is None:
+                    # No embedded section seen yet, so the row width is unknown
+                    pending = chunk_ids
+                    continue
+                pending = []
+                header = self._append(header, chunk)
+        return self.matrix()
+
+    def _last_id(self, header: Optional[dict]) -> int:
+        if header is None or header["count"] == 0:
+            return 0
+        index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(header["count"],))
+        return int(index["id"][-1])
+
+    def _append(self, header: Optional[dict], chunk: ResumeMatrix) -> dict:
+        if header is None:
+            self._create(chunk.dim)
+            header = self._read_header()
+        dim = header["dim"]
+        vectors = chunk.vectors
+        if chunk.dim == 0:
+            # None of these resumes has an embedded section
+            vectors = np.zeros((len(chunk), len(self.layout), dim), dtype=np.float32)
+        elif chunk.dim != dim:
+            raise ValueError(f"Embedding dim {chunk.dim} does not match {self.path} ({dim})")
+
+        rows = np.zeros(len(chunk), dtype=self._row_dtype(dim))
+        if self.dtype == "float32":
+            rows["vectors"] = vectors
+        else:
+            rows["vectors"], scales = quantize_vectors(vectors, self.dtype)
+            if scales is not None:
+                rows["scales"] = scales
+
+        count = header["count"]
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER_SIZE + count * rows.dtype.itemsize)
+            f.write(rows.tobytes())
+            index = np.zeros(len(chunk), dtype=INDEX_DTYPE)
+            index["id"] = chunk.ids
+            index["presence"] = chunk.presence
+            with open(self.index_path, "r+b") as index_file:
+                index_file.seek(count * INDEX_DTYPE.itemsize)
+                index_file.write(index.tobytes())
+                index_file.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            # Publishing the new count last makes the appended rows visible
+            self._write_header(f, dim, count + len(chunk))
+        return self._read_header()
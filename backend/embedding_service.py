@@ -0,0 +1,107 @@
+import os
+import threading
+import numpy as np
+
+from metrics import TEXTS_ENCODED
+from warmup import timed_load
+
+MODEL_NAME = os.getenv("RECRUITLY_MODEL", "all-MiniLM-L6-v2")
+
+# Air-gapped deployments: load the model from the local cache only
+OFFLINE = os.getenv("RECRUITLY_OFFLINE", "0") == "1"
+
+# Single process-wide model instance, created on first use
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Return the shared SentenceTransformer, loading it on first call"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if OFFLINE:
+                    # Must be set before sentence_transformers imports the hub client
+                    os.environ["HF_HUB_OFFLINE"] = "1"
+                    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+                with timed_load("sentence_transformer"):
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+def encode(text):
+    """Encode a single text into a float32 vector"""
+    return encode_many([text])[0]
+
+def encode_many(texts, batch_size=64):
+    """Encode a list of texts in batched forward passes.
+
+    Returns a (len(texts), dim) float32 array.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    embeddings = get_model().encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    return np.asarray(embeddings, dtype=np.float32)
+
+def normalize_rows(matrix):
+    """L2-normalize each row, matching the epsilon used by util.cos_sim"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+class TemplateClassifier:
+    """Assigns lines to the label of their most similar template group.
+
+    All templates are stacked into one normalized matrix so a whole document
+    is scored with a single encode call and a single matrix multiply.
+    """
+    def __init__(self, templates: dict, threshold: float = 0.4, name: str = "templates"):
+        self.templates = templates
+        self.name = name
+        self.labels = list(templates)
+        self.threshold = threshold
+        self._matrix = None
+        self._offsets = None
+        self._build_lock = threading.Lock()
+
+    def _build(self):
+        # Concurrent first calls build once; _offsets is published before
+        # _matrix, so a reader that sees _matrix set also sees its offsets
+        with self._build_lock:
+            if self._matrix is not None:
+                return
+            texts, offsets = [], []
+            for label in self.labels:
+                offsets.append(len(texts))
+                texts.extend(self.templates[label])
+            with timed_load(self.name):
+                matrix = normalize_rows(encode_many(texts))
+            self._offsets = np.array(offsets)
+            self._matrix = matrix
+
+    def warm_up(self):
+        """Encode the templates now rather than on the first classification"""
+        if self._matrix is None:
+            self._build()
+
+    def classify_many(self, lines):
+        """Classify a batch of lines, returning a label or None for each"""
+        lines = list(lines)
+        if not lines:
+            return []
+        if self._matrix is None:
+            self._build()
+
+        similarities = normalize_rows(encode_many(lines)) @ self._matrix.T
+        TEXTS_ENCODED.inc(len(lines), purpose=self.name)
+        # Best template score within each label group, then best group per line
+        group_scores = np.maximum.reduceat(similarities, self._offsets, axis=1)
+        best = group_scores.argmax(axis=1)
+        return [
+            self.labels[b] if group_scores[i, b] > self.threshold else None
+            for i, b in enumerate(best)
+        ]
+
+    def classify(self, line):
+        return self.classify_many([line])[0]
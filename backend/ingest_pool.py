@@ -0,0 +1,187 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, List, Tuple
+
+import metrics
+
+# Number of parsing worker processes; 0 parses in the API process's thread pool
+INGEST_WORKERS = int(os.getenv("RECRUITLY_INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Upper bound on resumes whose sections are embedded in one encode call
+EMBED_BATCH_RESUMES = int(os.getenv("RECRUITLY_EMBED_BATCH_RESUMES", "32"))
+# Seconds on top of RECRUITLY_PDF_TIMEOUT a worker gets for section parsing
+# (and, on a cold worker, loading the models) before it is killed
+PARSE_TIMEOUT_MARGIN = float(os.getenv("RECRUITLY_PARSE_TIMEOUT_MARGIN", "60"))
+
+def _init_worker():
+    """Load the models once per worker process instead of once per file"""
+    from warmup import warm_up
+    from pdf_extract import set_page_workers
+    # Files are already extracted in parallel across workers
+    set_page_workers(0)
+    try:
+        import torch
+        # One intra-op thread per worker: the workers already cover the cores
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    warm_up()
+
+def parse_resume_file(file_path: str):
+    """Worker task: PDF text extraction plus section parsing.
+
+    Returns (text, parsed, metric events) for metrics.replay().
+    """
+    from resume_embedding_utils import pdf_to_text, extract_resume_sections
+    with metrics.capture() as events:
+        text = pdf_to_text(file_path)
+        parsed = extract_resume_sections(text)
+    return text, parsed, events
+
+def _embed_batch(parsed_list):
+    from resume_embedding_utils import embed_resume_sections_batch
+    return embed_resume_sections_batch(parsed_list)
+
+class IngestPool:
+    """Parses resumes in worker processes and embeds them in coalesced batches.
+
+    PDF extraction and parsing run in a process pool so they neither block
+    the event loop nor serialize on the GIL. Section embedding stays in this
+    process: while one embedding batch runs, newly parsed resumes queue up
+    and are all embedded together by the next batch.
+    """
+    def __init__(self, workers: int = INGEST_WORKERS, embed_batch: int = EMBED_BATCH_RESUMES):
+        self.workers = workers
+        self.embed_batch = embed_batch
+        self._executor = None
+        # At most one task in flight per worker, so a submitted task is
+        # running (not queued) and its deadline measures parsing time only
+        self._slots = None
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn avoids forking a parent that already has torch threads running
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _recycle(self, executor, kill: bool = False):
+        """Drop a broken (or, with kill, hung) pool so the next task starts a fresh one"""
+        if executor is None:
+            return
+        if self._executor is executor:
+            self._executor = None
+        if kill:
+            # A worker stuck inside a C extension ignores everything but a
+            # kill; the others' tasks fail with BrokenProcessPool and retry
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_parse(self, file_path):
+        loop = asyncio.get_running_loop()
+        if self._get_executor() is None:
+            # Threads can't be stopped; pdf_extract's own deadline applies
+            return await loop.run_in_executor(None, parse_resume_file, file_path)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            return await self._run_parse_in_worker(loop, file_path)
+
+    async def _run_parse_in_worker(self, loop, file_path):
+        from pdf_extract import PDF_TIMEOUT, PDFTimeoutError
+        name = os.path.basename(file_path)
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                task = loop.run_in_executor(executor, parse_resume_file, file_path)
+                # In-worker timeouts can't interrupt a hang in a PDF library's
+                # C code, so the deadline is also enforced from here
+                return await asyncio.wait_for(task, PDF_TIMEOUT + PARSE_TIMEOUT_MARGIN)
+            except asyncio.TimeoutError:
+                self._recycle(executor, kill=True)
+                raise PDFTimeoutError(f"Parsing {name} timed out")
+            except BrokenProcessPool:
+                # A worker died (OOM, a crash in a PDF library, a failing
+                # initializer, or another task's timeout kill); every task
+                # in flight fails with it, so start a new pool and retry once
+                self._recycle(executor)
+                if attempt:
+                    raise
+            except asyncio.CancelledError:
+                # Recycling the pool for another upload cancels its queued
+                # futures; only our own cancellation is passed on
+                current = asyncio.current_task()
+                if self._executor is executor or getattr(current, "cancelling", lambda: 0)():
+                    raise
+                if attempt:
+                    raise BrokenProcessPool(f"Worker pool restarted while parsing {name}")
+
+    async def _parse(self, key, file_path):
+        try:
+            text, parsed, events = await self._run_parse(file_path)
+            metrics.replay(events)
+            return key, text, parsed, None
+        except Exception as e:
+            return key, None, None, e
+
+    async def _embed(self, batch):
+        loop = asyncio.get_running_loop()
+        # Run in this request's context so embedding time reaches its Server-Timing
+        embeddings = await loop.run_in_executor(
+            None, contextvars.copy_context().run, _embed_batch, [parsed for _, _, parsed in batch]
+        )
+        return [(key, text, parsed, emb) for (key, text, parsed), emb in zip(batch, embeddings)]
+
+    async def process(self, jobs: List[Tuple[Any, str]]) -> AsyncIterator[Tuple[Any, Any]]:
+        """Process (key, file_path) jobs, yielding results as they complete.
+
+        Yields (key, (text, parsed, embeddings)) on success and
+        (key, exception) on failure, in completion order.
+        """
+        pending = {asyncio.ensure_future(self._parse(key, path)) for key, path in jobs}
+        queue = []
+        embedding = None
+        embedding_keys = []
+
+        while pending or queue or embedding:
+            if embedding is None and queue:
+                batch, queue = queue[:self.embed_batch], queue[self.embed_batch:]
+                embedding = asyncio.ensure_future(self._embed(batch))
+                embedding_keys = [key for key, _, _ in batch]
+
+            waiting = pending | ({embedding} if embedding else set())
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task is embedding:
+                    embedding = None
+                    try:
+                        embedded = task.result()
+                    except Exception as e:
+                        # Embedding failed for the whole batch; report it per resume
+                        for key in embedding_keys:
+                            yield key, e
+                        continue
+                    for key, text, parsed, emb in embedded:
+                        yield key, (text, parsed, emb)
+                else:
+                    pending.discard(task)
+                    key, text, parsed, error = task.result()
+                    if error is not None:
+                        yield key, error
+                    else:
+                        queue.append((key, text, parsed))
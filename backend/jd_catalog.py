@@ -0,0 +1,133 @@
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+
+from embedding_service import MODEL_NAME
+from matcher import PackedEmbeddings, pack_jd_embeddings
+from database import DB_PATH, connect
+from resume_store import vector_to_blob, blob_to_vector
+
+def jd_content_hash(jd_text: str) -> str:
+    """SHA-256 of the JD text plus the embedding model name"""
+    digest = hashlib.sha256(jd_text.encode("utf-8"))
+    digest.update(f"\0{MODEL_NAME}".encode())
+    return digest.hexdigest()
+
+def init_jd_tables(cursor):
+    """Create the tables holding the JD catalog and its section embeddings"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_descriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            embedding TEXT,
+            sections TEXT,
+            summary TEXT,
+            content_hash TEXT
+        )
+    """)
+    # Databases created before the catalog lack the column
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(job_descriptions)")}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE job_descriptions ADD COLUMN content_hash TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_job_descriptions_content_hash ON job_descriptions (content_hash)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jd_embeddings (
+            jd_id INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (jd_id, section),
+            FOREIGN KEY (jd_id) REFERENCES job_descriptions (id)
+        )
+    """)
+
+class JDCatalog:
+    """Persistent catalog of analyzed job descriptions.
+
+    Section embeddings are stored as float32 blobs and kept in memory as a
+    PackedEmbeddings so a resume can be scored against every JD at once.
+    The packed copy is reloaded lazily after any write.
+    """
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._packed = None
+        self._titles = {}
+
+    def find(self, content_hash: str) -> Optional[int]:
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT id FROM job_descriptions WHERE content_hash = ? ORDER BY id LIMIT 1", (content_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, jd_text: str, result: Dict) -> int:
+        """Store an analyzed JD unless the same text is already cataloged; returns its id"""
+        content_hash = jd_content_hash(jd_text)
+        jd_id = self.find(content_hash)
+        if jd_id is not None:
+            return jd_id
+
+        with connect(self.db_path) as conn:
+            jd_id = _insert_jd(conn.cursor(), result, content_hash)
+        self.invalidate()
+        return jd_id
+
+    def add_many(self, entries) -> List[int]:
+        """Store [(result, content_hash)] in a single transaction; returns the new ids"""
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            jd_ids = [_insert_jd(cursor, result, content_hash) for result, content_hash in entries]
+        self.invalidate()
+        return jd_ids
+
+    def known_hashes(self) -> set:
+        """Content hashes of every cataloged JD"""
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT content_hash FROM job_descriptions WHERE content_hash IS NOT NULL").fetchall()
+        return {row[0] for row in rows}
+
+    def invalidate(self):
+        with self._lock:
+            self._packed = None
+
+    def list(self) -> List[Dict]:
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT id, title, summary FROM job_descriptions ORDER BY id").fetchall()
+        return [{"id": jd_id, "title": title, "summary": summary or ""} for jd_id, title, summary in rows]
+
+    def packed(self) -> PackedEmbeddings:
+        """Section embeddings of every cataloged JD, keyed by JD id"""
+        with self._lock:
+            if self._packed is None:
+                self._packed, self._titles = self._load()
+            return self._packed
+
+    def title(self, jd_id: int) -> str:
+        self.packed()
+        return self._titles.get(jd_id, "Unknown")
+
+    def _load(self):
+        with connect(self.db_path) as conn:
+            titles = dict(conn.execute("SELECT id, title FROM job_descriptions ORDER BY id").fetchall())
+            embeddings = {jd_id: {} for jd_id in titles}
+            for jd_id, section, blob in conn.execute("SELECT jd_id, section, vector FROM jd_embeddings"):
+                if jd_id in embeddings:
+                    embeddings[jd_id][section] = blob_to_vector(blob)
+        return pack_jd_embeddings({jd_id: {"embedding": emb} for jd_id, emb in embeddings.items()}), titles
+
+def _insert_jd(cursor, result: Dict, content_hash: str) -> int:
+    cursor.execute(
+        "INSERT INTO job_descriptions (title, sections, summary, content_hash) VALUES (?, ?, ?, ?)",
+        (result["title"], json.dumps(result["sections"]), result.get("summary", ""), content_hash)
+    )
+    jd_id = cursor.lastrowid
+    cursor.executemany(
+        "INSERT INTO jd_embeddings (jd_id, section, vector) VALUES (?, ?, ?)",
+        [
+            (jd_id, section, vector_to_blob(vector))
+            for section, vector in result["embedding"].items()
+            if vector is not None
+        ]
+    )
+    return jd_id
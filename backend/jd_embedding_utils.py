@@ -1,20 +1,11 @@
 import re
-import nltk
-from nltk import sent_tokenize
-from collections import defaultdict
-from sentence_transformers import SentenceTransformer, util
-import spacy
+from collections import defaultdict, OrderedDict
+import hashlib
+import threading
 import numpy as np
 
-# Ensure nltk data is available
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt")
-
-# Load models
-sbert = SentenceTransformer("all-MiniLM-L6-v2")
-nlp = spacy.load("en_core_web_sm")
+from embedding_service import encode_many, TemplateClassifier
+from metrics import TEXTS_ENCODED, cache_lookup, stage
 
 # Relevant templates
 TEMPLATES = {
@@ -23,7 +14,7 @@ TEMPLATES = {
     "qualifications": ["Bachelor's or Master's in CS", "Degree in engineering or related field"]
 }
 
-TEMPLATE_EMBEDDINGS = {k: sbert.encode(v, convert_to_tensor=True) for k, v in TEMPLATES.items()}
+classifier = TemplateClassifier(TEMPLATES, threshold=0.4, name="jd_templates")
 
 COMMON_HEADERS = ['responsibilities', 'qualifications']
 
@@ -31,10 +22,10 @@ def clean_line(line):
     return line.strip()
 
 def classify_line(line):
-    line_embedding = sbert.encode(line, convert_to_tensor=True)
-    scores = {k: float(util.cos_sim(line_embedding, TEMPLATE_EMBEDDINGS[k]).max()) for k in TEMPLATE_EMBEDDINGS}
-    best_match = max(scores, key=scores.get)
-    return best_match if scores[best_match] > 0.4 else None
+    return classifier.classify(line)
+
+def classify_lines(lines):
+    return classifier.classify_many(lines)
 
 def extract_job_title(text):
     # Regex-based extraction
@@ -71,16 +62,42 @@ def extract_job_title(text):
 
     return "Unknown"
 
-def extract_sections(text):
+NORMALIZED_HEADERS = {
+    'responsibilities': 'responsibilities',
+    'qualifications': 'qualifications'
+}
+
+def lines_to_classify(text):
+    """The lines extract_sections classifies: everything before the first header"""
+    pending = []
+    for line in text.splitlines():
+        raw_line = line.strip()
+        if not raw_line:
+            continue
+        if raw_line.lower().strip(":").strip() in NORMALIZED_HEADERS:
+            break
+        pending.append(raw_line)
+    return pending
+
+def extract_sections(text, categories=None):
+    """Split a JD into title, responsibilities and qualifications.
+
+    categories, if given, are the precomputed classify_lines() labels for
+    lines_to_classify(text), letting callers batch classification across
+    many JDs.
+    """
     lines = text.splitlines()
     results = defaultdict(list)
     results["job_title"] = extract_job_title(text)
 
     current_section = None
-    normalized_headers = {
-        'responsibilities': 'responsibilities',
-        'qualifications': 'qualifications'
-    }
+    normalized_headers = NORMALIZED_HEADERS
+
+    # Only lines before the first header get classified, so encode them in one batch
+    if categories is None:
+        with stage("jd_classify"):
+            categories = classify_lines(lines_to_classify(text))
+    categories = iter(categories)
 
     for line in lines:
         raw_line = line.strip()
@@ -95,7 +112,7 @@ def extract_sections(text):
         if current_section:
             results[current_section].append(raw_line)
         else:
-            category = classify_line(raw_line)
+            category = next(categories)
             if category and category != "job_title":
                 results[category].append(raw_line)
 
@@ -106,20 +123,77 @@ def extract_sections(text):
 
     return dict(results)
 
-def generate_jd_embedding(jd_text):
-    parsed = extract_sections(jd_text)
-    title = parsed.get("job_title", "Unknown")
-
+# Sections of a JD that get their own embedding for matching
+EMBEDDED_SECTIONS = ["responsibilities", "qualifications"]
+
+# Memoized analyses keyed by SHA-256 of the JD text
+JD_CACHE_SIZE = 256
+_analysis_cache = OrderedDict()
+_analysis_lock = threading.Lock()
+
+def embed_jd_sections_batch(parsed_jds):
+    """Embed the sections of many parsed JDs with a single encode call"""
+    owners, texts = [], []
+    for i, parsed in enumerate(parsed_jds):
+        for section in EMBEDDED_SECTIONS:
+            lines = parsed.get(section, [])
+            if lines:
+                owners.append((i, section))
+                texts.append(" ".join(lines))
+
+    with stage("jd_embed"):
+        vectors = encode_many(texts)
+    TEXTS_ENCODED.inc(len(texts), purpose="jd_sections")
+    results = [{section: None for section in EMBEDDED_SECTIONS} for _ in parsed_jds]
+    for (i, section), vector in zip(owners, vectors):
+        results[i][section] = vector
+    return results
+
+def embed_jd_sections(parsed):
+    """Embed the responsibilities and qualifications of a parsed JD in one call"""
+    vectors = embed_jd_sections_batch([parsed])[0]
     embeddings_by_section = {}
-    for section in ["responsibilities", "qualifications"]:
-        lines = parsed.get(section, [])
-        if lines:
-            combined = " ".join(lines)
-            emb = sbert.encode(combined, convert_to_numpy=True)
-            embeddings_by_section[section] = emb
+    for section in EMBEDDED_SECTIONS:
+        emb = vectors.get(section)
+        if emb is not None:
             print(f"✅ Embedded section '{section}': shape = {emb.shape}")
         else:
             print(f"❌ No content found for section '{section}'")
-            embeddings_by_section[section] = None
+        embeddings_by_section[section] = emb
+
+    return embeddings_by_section
+
+def analyze_jd_text(jd_text):
+    """Parse and embed a JD in a single pass.
+
+    Returns {"title", "sections", "embedding"}. Results are memoized by the
+    hash of the text, so repeated analyses of the same JD are free.
+    """
+    key = hashlib.sha256(jd_text.encode("utf-8")).hexdigest()
+    with _analysis_lock:
+        cached = _analysis_cache.get(key)
+        if cached is not None:
+            _analysis_cache.move_to_end(key)
+    cache_lookup("jd_analysis", cached is not None)
+    if cached is None:
+        sections = extract_sections(jd_text)
+        cached = {
+            "title": sections.get("job_title", "Unknown"),
+            "sections": sections,
+            "embedding": embed_jd_sections(sections)
+        }
+        with _analysis_lock:
+            _analysis_cache[key] = cached
+            while len(_analysis_cache) > JD_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+
+    # Hand out copies (vectors included) so callers can't modify the memoized analysis
+    return {
+        "title": cached["title"],
+        "sections": {k: list(v) if isinstance(v, list) else v for k, v in cached["sections"].items()},
+        "embedding": {k: np.array(v) if v is not None else None for k, v in cached["embedding"].items()}
+    }
 
-    return title, embeddings_by_section
\ No newline at end of file
+def generate_jd_embedding(jd_text):
+    analysis = analyze_jd_text(jd_text)
+    return analysis["title"], analysis["embedding"]
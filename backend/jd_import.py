@@ -0,0 +1,108 @@
+"""Bulk import of job descriptions from CSV into the JD catalog.
+
+Usage: python jd_import.py path/to/job_description.csv [--batch-size N]
+"""
+import argparse
+import csv
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from jd_catalog import JDCatalog, jd_content_hash
+from jd_embedding_utils import lines_to_classify, classify_lines, extract_sections, embed_jd_sections_batch
+
+DEFAULT_BATCH_SIZE = 256
+
+def _decode_lines(binary_lines: Iterable[bytes]) -> Iterator[str]:
+    # Exported spreadsheets are often cp1252 (the bundled dataset is); accept both
+    for raw in binary_lines:
+        try:
+            yield raw.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            yield raw.decode("cp1252", errors="replace")
+
+def iter_csv_jds(binary_file) -> Iterator[Tuple[str, str]]:
+    """Stream (title, description) rows from a CSV with title/description columns"""
+    reader = csv.reader(_decode_lines(binary_file))
+    header = [column.strip().lower() for column in next(reader, [])]
+    title_col = next((i for i, c in enumerate(header) if "title" in c), 0)
+    text_col = next((i for i, c in enumerate(header) if "description" in c), 1)
+    for row in reader:
+        if len(row) <= text_col or not row[text_col].strip():
+            continue
+        title = row[title_col].strip() if len(row) > title_col else ""
+        yield title, row[text_col]
+
+def _analyze_batch(rows, agent):
+    """Parse and embed a batch of JDs with one classification and one embedding call"""
+    pending = [lines_to_classify(text) for _, text in rows]
+    flat_labels = classify_lines([line for lines in pending for line in lines])
+
+    parsed_jds = []
+    offset = 0
+    for (title, text), lines in zip(rows, pending):
+        categories = flat_labels[offset:offset + len(lines)]
+        offset += len(lines)
+        sections = extract_sections(text, categories=categories)
+        if title:
+            sections["job_title"] = title
+        parsed_jds.append(sections)
+
+    embeddings = embed_jd_sections_batch(parsed_jds)
+    return [
+        {
+            "title": sections.get("job_title", "Unknown"),
+            "sections": sections,
+            "embedding": embedding,
+            "summary": agent.generate_summary(sections)
+        }
+        for sections, embedding in zip(parsed_jds, embeddings)
+    ]
+
+def import_jds(rows: Iterable[Tuple[str, str]], catalog: JDCatalog,
+               batch_size: int = DEFAULT_BATCH_SIZE, agent=None) -> Dict[str, int]:
+    """Import (title, description) rows into the catalog.
+
+    Each batch is analyzed together and committed in one transaction. JDs
+    already in the catalog are skipped, so an interrupted import can simply
+    be run again.
+    """
+    if agent is None:
+        from agent_framework import JDAnalyzerAgent
+        agent = JDAnalyzerAgent()
+
+    known = catalog.known_hashes()
+    counts = {"imported": 0, "skipped": 0}
+    batch = []
+
+    def flush():
+        results = _analyze_batch([(title, text) for title, text, _ in batch], agent)
+        catalog.add_many([(result, content_hash) for result, (_, _, content_hash) in zip(results, batch)])
+        counts["imported"] += len(batch)
+        batch.clear()
+
+    for title, text in rows:
+        content_hash = jd_content_hash(text)
+        if content_hash in known:
+            counts["skipped"] += 1
+            continue
+        known.add(content_hash)
+        batch.append((title, text, content_hash))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return counts
+
+def import_csv(path: str, catalog: Optional[JDCatalog] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    catalog = catalog or JDCatalog()
+    with open(path, "rb") as f:
+        return import_jds(iter_csv_jds(f), catalog, batch_size=batch_size)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import job descriptions from CSV into the JD catalog")
+    parser.add_argument("csv_path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app import init_db
+    init_db()
+    print(import_csv(args.csv_path, batch_size=args.batch_size))
@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database import DB_PATH, connect
+from matcher import weights, explain_match
+
+def init_match_tables(cursor):
+    """Create the matches table with one row per (jd, resume) pair"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            resume_id INTEGER,
+            jd_id INTEGER,
+            score REAL,
+            reasoning TEXT,
+            sim_resp REAL,
+            sim_qual REAL,
+            FOREIGN KEY (resume_id) REFERENCES resumes (id),
+            FOREIGN KEY (jd_id) REFERENCES job_descriptions (id)
+        )
+    """)
+    # Databases created before similarities were kept lack the columns
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(matches)")}
+    for column in ("sim_resp", "sim_qual"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE matches ADD COLUMN {column} REAL")
+    # Older databases appended a row per re-match; keep only the latest
+    # before enforcing uniqueness
+    cursor.execute("""
+        DELETE FROM matches
+        WHERE jd_id IS NOT NULL AND resume_id IS NOT NULL
+          AND id NOT IN (
+              SELECT MAX(id) FROM matches
+              WHERE jd_id IS NOT NULL AND resume_id IS NOT NULL
+              GROUP BY jd_id, resume_id
+          )
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_matches_jd_resume ON matches (jd_id, resume_id)")
+    # Serves "best candidates for a JD" reads without a sort
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_matches_jd_score ON matches (jd_id, score)")
+
+class MatchStore:
+    """Writes match results to the pooled database connection.
+
+    Each save is a single executemany upsert inside one transaction, so
+    re-matching a JD updates its rows instead of appending duplicates.
+    Rows keep the raw responsibilities / qualifications similarities, so
+    results can be re-weighted and re-thresholded without re-matching.
+    """
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+
+    def save_matches(self, jd_id: Optional[int], resume_ids: List[Optional[int]], scores, sim_resp, sim_qual) -> int:
+        """Upsert the scores of every resume for a JD; returns rows written.
+
+        Takes the matcher's score arrays rather than candidate dicts, so the
+        reasoning text is only built here, off the request path.
+        """
+        if jd_id is None:
+            return 0
+        rows = [
+            (resume_id, jd_id, round(float(score), 3), json.dumps(explain_match(float(resp), float(qual))),
+             float(resp), float(qual))
+            for resume_id, score, resp, qual in zip(resume_ids, scores, sim_resp, sim_qual)
+            if resume_id is not None
+        ]
+        with connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO matches (resume_id, jd_id, score, reasoning, sim_resp, sim_qual)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (jd_id, resume_id) DO UPDATE SET
+                    score = excluded.score,
+                    reasoning = excluded.reasoning,
+                    sim_resp = excluded.sim_resp,
+                    sim_qual = excluded.sim_qual
+            """, rows)
+        return len(rows)
+
+    def rescore(self, jd_id: int, threshold: float = 0.8,
+                resp_weight: float = weights["responsibilities"],
+                qual_weight: float = weights["qualifications"]) -> List[Dict]:
+        """Stored matches of a JD re-weighted from their similarities, best first.
+
+        Rows saved before similarities were kept fall back to their stored
+        score and reasoning.
+        """
+        with connect(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT m.resume_id, r.filename, json_extract(r.parsed, '$.name[0]'),
+                       m.sim_resp, m.sim_qual, m.reasoning,
+                       CASE WHEN m.sim_resp IS NULL OR m.sim_qual IS NULL THEN m.score
+                            ELSE m.sim_resp * ? + m.sim_qual * ? END AS weighted
+                FROM matches m LEFT JOIN resumes r ON r.id = m.resume_id
+                WHERE m.jd_id = ?
+                ORDER BY weighted DESC
+            """, (resp_weight, qual_weight, jd_id)).fetchall()
+
+        candidates = []
+        for resume_id, filename, name, sim_resp, sim_qual, reasoning, weighted in rows:
+            score = round(weighted or 0.0, 3)
+            if sim_resp is not None and sim_qual is not None:
+                reasoning = explain_match(sim_resp, sim_qual)
+            else:
+                reasoning = json.loads(reasoning) if reasoning else []
+            candidates.append({
+                "name": (name or "").strip() or Path(filename or str(resume_id)).stem,
+                "score": score,
+                "reasoning": reasoning,
+                "resume_id": resume_id,
+                "is_match": score >= threshold,
+                "sim_resp": sim_resp,
+                "sim_qual": sim_qual
+            })
+        return candidates
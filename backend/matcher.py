@@ -1,17 +1,29 @@
-from sentence_transformers import util
 import numpy as np
 
+from metrics import stage
+
 # Weights for each aligned JD section
 weights = {
     "responsibilities": 0.7,
     "qualifications": 0.7
 }
 
+# Resume sections averaged into each side of the comparison
+RESPONSIBILITY_SECTIONS = ["experience", "projects"]
+QUALIFICATION_SECTIONS = ["education", "certifications", "skills"]
+
 # Function to compute cosine similarity with fallback
 def safe_cos_sim(vec1, vec2):
     if vec1 is None or vec2 is None:
         return 0.0
-    return float(util.cos_sim(vec1, vec2).item())
+    vec1 = _normalize(vec1)
+    vec2 = _normalize(vec2)
+    return float(np.dot(vec1, vec2))
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
 
 # Enhanced explanation with match levels
 def interpret_match(label, score):
@@ -30,8 +42,7 @@ def calculate_match_score(jd_embeddings, resume_embeddings):
     # Responsibilities: experience + projects
     jd_resp = jd_embeddings.get("responsibilities")
     resume_resp = _combine_embeddings([
-        resume_embeddings.get("experience"),
-        resume_embeddings.get("projects")
+        resume_embeddings.get(section) for section in RESPONSIBILITY_SECTIONS
     ])
     sim_resp = safe_cos_sim(jd_resp, resume_resp)
     total_score += sim_resp * weights["responsibilities"]
@@ -40,9 +51,7 @@ def calculate_match_score(jd_embeddings, resume_embeddings):
     # Qualifications: education + certs + skills
     jd_qual = jd_embeddings.get("qualifications")
     resume_qual = _combine_embeddings([
-        resume_embeddings.get("education"),
-        resume_embeddings.get("certifications"),
-        resume_embeddings.get("skills")
+        resume_embeddings.get(section) for section in QUALIFICATION_SECTIONS
     ])
     sim_qual = safe_cos_sim(jd_qual, resume_qual)
     total_score += sim_qual * weights["qualifications"]
@@ -57,34 +66,318 @@ def _combine_embeddings(embeddings_list):
         return None
     return np.mean(valid, axis=0)
 
+class PackedEmbeddings:
+    """Section embeddings packed into contiguous float32 matrices.
+
+    Each side (responsibilities / qualifications) holds one row per document.
+    For resumes a row is the sum of that resume's section vectors for the
+    side; for JDs it is the JD's own section vector. A presence mask marks
+    rows that had at least one section. Cosine similarity is scale
+    invariant, so the sum scores the same as the mean used by
+    calculate_match_score. With normalized, rows are already unit vectors
+    (zero where missing) and are scored without re-normalizing. With
+    scales, rows are int8 codes whose vector is code * scale; the (N, 2)
+    per-side scales are applied to the products, not to the rows.
+    """
+    def __init__(self, keys, resp, resp_mask, qual, qual_mask, normalized=False, scales=None):
+        self.keys = keys
+        self.resp = resp
+        self.resp_mask = resp_mask
+        self.qual = qual
+        self.qual_mask = qual_mask
+        self.normalized = normalized
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.keys)
+
+    def slice(self, start, stop):
+        """Rows start:stop as a new PackedEmbeddings (views, no copies)"""
+        return PackedEmbeddings(
+            self.keys[start:stop],
+            self.resp[start:stop],
+            self.resp_mask[start:stop],
+            self.qual[start:stop],
+            self.qual_mask[start:stop],
+            self.normalized,
+            self.scales[start:stop] if self.scales is not None else None
+        )
+
+def pack_resume_embeddings(resume_data):
+    """Pack the section embeddings of {key: resume} into a PackedEmbeddings"""
+    return _pack(resume_data, RESPONSIBILITY_SECTIONS, QUALIFICATION_SECTIONS)
+
+def pack_jd_embeddings(jd_data):
+    """Pack the section embeddings of {key: jd} into a PackedEmbeddings"""
+    return _pack(jd_data, ["responsibilities"], ["qualifications"])
+
+def _pack(data, resp_sections, qual_sections):
+    keys = list(data)
+    dim = _embedding_dim(data.values())
+    sides = []
+    for side_sections in (resp_sections, qual_sections):
+        matrix = np.zeros((len(keys), dim), dtype=np.float32)
+        mask = np.zeros(len(keys), dtype=bool)
+        for row, key in enumerate(keys):
+            embeddings = data[key].get("embedding") or {}
+            for section in side_sections:
+                vec = embeddings.get(section)
+                if vec is not None:
+                    matrix[row] += vec
+                    mask[row] = True
+        sides.append((matrix, mask))
+    (resp, resp_mask), (qual, qual_mask) = sides
+    return PackedEmbeddings(keys, resp, resp_mask, qual, qual_mask)
+
+def _embedding_dim(resumes):
+    for data in resumes:
+        for vec in (data.get("embedding") or {}).values():
+            if vec is not None:
+                return len(vec)
+    return 0
+
+def _side_similarity(jd_vec, matrix, mask, normalized=False, scale=None):
+    """Cosine similarity of one JD vector against every row; 0.0 where missing"""
+    if jd_vec is None or matrix.shape[1] == 0:
+        return np.zeros(len(mask), dtype=np.float64)
+    sims = (matrix if normalized else _normalize(matrix)) @ _normalize(jd_vec)
+    if scale is not None:
+        sims = sims * scale
+    return np.where(mask, sims, 0.0).astype(np.float64)
+
+def score_packed(jd_embeddings, packed, tile_size=65536):
+    """Score every packed resume against a JD in two matrix-vector products per tile.
+
+    packed is a PackedEmbeddings or anything else with slice() (e.g. a
+    ResumeMatrix, whose quantized rows are then only decoded a tile at a
+    time). Returns (scores, sim_resp, sim_qual) as float64 arrays; scores
+    are the unrounded weighted totals of calculate_match_score.
+    """
+    sim_resp = np.zeros(len(packed), dtype=np.float64)
+    sim_qual = np.zeros(len(packed), dtype=np.float64)
+    for start in range(0, len(packed), tile_size):
+        tile = packed.slice(start, start + tile_size)
+        stop = start + len(tile)
+        resp_scale, qual_scale = _side_scales(tile)
+        sim_resp[start:stop] = _side_similarity(jd_embeddings.get("responsibilities"), tile.resp,
+                                                tile.resp_mask, tile.normalized, resp_scale)
+        sim_qual[start:stop] = _side_similarity(jd_embeddings.get("qualifications"), tile.qual,
+                                                tile.qual_mask, tile.normalized, qual_scale)
+    scores = sim_resp * weights["responsibilities"] + sim_qual * weights["qualifications"]
+    return scores, sim_resp, sim_qual
+
+def score_jds_for_resume(resume_embeddings, packed_jds):
+    """Score one resume against every packed JD (the reverse of score_packed).
+
+    Returns (scores, sim_resp, sim_qual) as float64 arrays aligned with
+    packed_jds.keys; cosine similarity is symmetric, so each entry equals
+    calculate_match_score(jd_embeddings, resume_embeddings).
+    """
+    resume_resp = _combine_embeddings([resume_embeddings.get(section) for section in RESPONSIBILITY_SECTIONS])
+    resume_qual = _combine_embeddings([resume_embeddings.get(section) for section in QUALIFICATION_SECTIONS])
+    sim_resp = _side_similarity(resume_resp, packed_jds.resp, packed_jds.resp_mask)
+    sim_qual = _side_similarity(resume_qual, packed_jds.qual, packed_jds.qual_mask)
+    scores = sim_resp * weights["responsibilities"] + sim_qual * weights["qualifications"]
+    return scores, sim_resp, sim_qual
+
+def _weighted_sides(packed):
+    """Unit-normalized, weighted side matrices with missing rows zeroed"""
+    resp = _normalize(packed.resp) * packed.resp_mask[:, None] * np.float32(weights["responsibilities"])
+    qual = _normalize(packed.qual) * packed.qual_mask[:, None] * np.float32(weights["qualifications"])
+    return resp, qual
+
+def _side_scales(packed):
+    if packed.scales is None:
+        return None, None
+    return packed.scales[:, 0], packed.scales[:, 1]
+
+def _unit_sides(packed):
+    if packed.scales is not None:
+        resp_scale, qual_scale = _side_scales(packed)
+        return packed.resp * resp_scale[:, None], packed.qual * qual_scale[:, None]
+    if packed.normalized:
+        return packed.resp, packed.qual
+    resp = _normalize(packed.resp) * packed.resp_mask[:, None]
+    qual = _normalize(packed.qual) * packed.qual_mask[:, None]
+    return resp, qual
+
+def iter_score_tiles(packed_jds, packed_resumes, tile_size=8192):
+    """Yield (start, scores) tiles of the full JD x resume score matrix.
+
+    scores is a (len(packed_jds), tile) float32 block for resume columns
+    start:start+tile, computed as two normalized matrix products. Entries
+    equal calculate_match_score up to float32 rounding.
+    """
+    jd_resp, jd_qual = _weighted_sides(packed_jds)
+    for start in range(0, len(packed_resumes), tile_size):
+        tile = packed_resumes.slice(start, start + tile_size)
+        resp, qual = (tile.resp, tile.qual) if tile.scales is not None else _unit_sides(tile)
+        if jd_resp.shape[1] != resp.shape[1] or jd_qual.shape[1] != qual.shape[1]:
+            # One side has no embeddings at all, so every score is zero
+            yield start, np.zeros((len(packed_jds), len(tile)), dtype=np.float32)
+            continue
+        if tile.scales is not None:
+            # int8 codes: scale the products rather than decoding the tile first
+            resp_scale, qual_scale = _side_scales(tile)
+            yield start, (jd_resp @ resp.T) * resp_scale + (jd_qual @ qual.T) * qual_scale
+            continue
+        yield start, jd_resp @ resp.T + jd_qual @ qual.T
+
+def score_matrix(packed_jds, packed_resumes, tile_size=8192):
+    """The full (len(packed_jds), len(packed_resumes)) float32 score matrix"""
+    scores = np.zeros((len(packed_jds), len(packed_resumes)), dtype=np.float32)
+    for start, tile in iter_score_tiles(packed_jds, packed_resumes, tile_size):
+        scores[:, start:start + tile.shape[1]] = tile
+    return scores
+
+def top_k_per_jd(packed_jds, packed_resumes, k, tile_size=8192):
+    """Best k resumes for every JD without materializing the full matrix.
+
+    Returns (indices, scores), each (len(packed_jds), k), sorted by
+    descending score; indices point into packed_resumes.keys.
+    """
+    with stage("match_matrix"):
+        return _top_k_tiles(packed_jds, packed_resumes, min(k, len(packed_resumes)), tile_size)
+
+def _top_k_tiles(packed_jds, packed_resumes, k, tile_size):
+    best_idx = np.zeros((len(packed_jds), 0), dtype=np.int64)
+    best_scores = np.zeros((len(packed_jds), 0), dtype=np.float32)
+    for start, tile in iter_score_tiles(packed_jds, packed_resumes, tile_size):
+        # Merge this tile's columns into the running top k
+        cand_scores = np.hstack([best_scores, tile])
+        cand_idx = np.hstack([best_idx, np.broadcast_to(np.arange(start, start + tile.shape[1]), tile.shape)])
+        if cand_scores.shape[1] > k:
+            keep = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+            cand_scores = np.take_along_axis(cand_scores, keep, axis=1)
+            cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+        best_scores, best_idx = cand_scores, cand_idx
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+def resume_match_vectors(packed):
+    """Concatenated [responsibilities | qualifications] unit vectors per resume.
+
+    The dot product of a row with jd_query_vector() equals the unrounded
+    score_packed() total, which lets any inner-product index rank resumes.
+    """
+    resp, qual = _unit_sides(packed)
+    return np.hstack([resp, qual]).astype(np.float32)
+
+def jd_query_vector(jd_embeddings, dim):
+    """Weighted [responsibilities | qualifications] query for resume_match_vectors()"""
+    parts = []
+    for section in ["responsibilities", "qualifications"]:
+        vec = jd_embeddings.get(section)
+        if vec is None:
+            parts.append(np.zeros(dim, dtype=np.float32))
+        else:
+            parts.append(_normalize(vec) * weights[section])
+    return np.concatenate(parts).astype(np.float32)
+
+def explain_match(sim_resp, sim_qual):
+    """Human-readable reasoning for a pair of section similarities"""
+    return [
+        interpret_match("Responsibilities", sim_resp),
+        interpret_match("Qualifications", sim_qual)
+    ]
+
+def rank_rows(scores, top_k=None, offset=0, min_score=None, order="desc"):
+    """Row indices of one page of scores: filtered, sorted, then [offset:offset + top_k].
+
+    Scores are compared and ordered as rounded for display, ties keep row
+    order, and only the rows up to the end of the page are ever sorted
+    (argpartition picks them first). Returns (rows, total) where total
+    counts every row passing min_score.
+    """
+    rounded = np.round(np.asarray(scores, dtype=np.float64), 3)
+    rows = np.arange(len(rounded)) if min_score is None else np.flatnonzero(rounded >= min_score)
+    total = len(rows)
+    key = -rounded[rows] if order == "desc" else rounded[rows]
+    end = total if top_k is None else min(offset + max(top_k, 0), total)
+    if end < total:
+        if end == 0:
+            return rows[:0], total
+        # The partition ignores row order, so keep every row tied with the cut-off
+        cutoff = np.partition(key, end - 1)[end - 1]
+        keep = key <= cutoff
+        rows, key = rows[keep], key[keep]
+    page = np.lexsort((rows, key))[offset:end]
+    return rows[page], total
+
+def build_candidate(data, key, score, sim_resp, sim_qual, threshold):
+    """Candidate dict for one scored resume record; key names it when no name was parsed"""
+    score = round(float(score), 3)
+    return {
+        "name": _extract_name(data.get("parsed", {}), fallback=key),
+        "score": score,
+        "reasoning": explain_match(float(sim_resp), float(sim_qual)),
+        "resume_id": data.get("id"),  # Assuming resume ID is stored in data
+        "is_match": score >= threshold,  # Flag for passing the threshold
+        # Raw section similarities, so results can be re-weighted later
+        "sim_resp": float(sim_resp),
+        "sim_qual": float(sim_qual)
+    }
+
 # Main matcher
-def match_all_resumes(jd_title, jd_embeddings, resume_data, threshold=0.8):
+def match_all_resumes(jd_title, jd_embeddings, resume_data, threshold=0.8, verbose=False):
     all_candidates = []
 
     print(f"\n📌 Matching resumes against JD: **{jd_title}**\n")
 
-    for filename, data in resume_data.items():
-        parsed = data.get("parsed", {})
-        embeddings = data.get("embedding", {})
+    with stage("match"):
+        packed = pack_resume_embeddings(resume_data)
+        scores, sim_resp, sim_qual = score_packed(jd_embeddings, packed)
+
+    for row, filename in enumerate(packed.keys):
+        candidate = build_candidate(resume_data[filename], filename, scores[row], sim_resp[row], sim_qual[row], threshold)
 
-        name = _extract_name(parsed, fallback=filename)
-        score, explanation = calculate_match_score(jd_embeddings, embeddings)
+        if verbose:
+            print(f"🔍 {candidate['name']} — Score: {round(candidate['score']*100, 1)}%")
+            for line in candidate["reasoning"]:
+                print("   •", line)
+            print("✅ Shortlisted\n" if candidate["is_match"] else "❌ Not shortlisted\n")
 
-        print(f"🔍 {name} — Score: {round(score*100, 1)}%")
-        for line in explanation:
-            print("   •", line)
-        print("✅ Shortlisted\n" if score >= threshold else "❌ Not shortlisted\n")
+        all_candidates.append(candidate)
 
-        all_candidates.append({
-            "name": name,
-            "score": score,
-            "reasoning": explanation,
-            "resume_id": data.get("id"),  # Assuming resume ID is stored in data
-            "is_match": score >= threshold  # Flag for passing the threshold
-        })
+    print(f"✅ Scored {len(all_candidates)} resumes, "
+          f"{sum(c['is_match'] for c in all_candidates)} shortlisted\n")
 
     return all_candidates
 
+def rank_resumes(jd_title, jd_embeddings, resume_data, threshold=0.8,
+                 top_k=None, offset=0, min_score=None, order="desc"):
+    """Score every resume but build candidates only for the requested page.
+
+    Returns (candidates, total, packed, scores, sim_resp, sim_qual): the page
+    of candidate dicts in rank order, how many resumes passed min_score, and
+    the full score arrays aligned with packed.keys for persistence.
+    """
+    packed = pack_resume_embeddings(resume_data)
+    rows, total, scores, sim_resp, sim_qual = rank_packed(
+        jd_title, jd_embeddings, packed, threshold, top_k, offset, min_score, order
+    )
+    candidates = [
+        build_candidate(resume_data[packed.keys[row]], packed.keys[row], scores[row], sim_resp[row], sim_qual[row],
+                        threshold)
+        for row in rows
+    ]
+    return candidates, total, packed, scores, sim_resp, sim_qual
+
+def rank_packed(jd_title, jd_embeddings, packed, threshold=0.8,
+                top_k=None, offset=0, min_score=None, order="desc"):
+    """Score packed resumes (a PackedEmbeddings or ResumeMatrix) and pick one page of rows.
+
+    Returns (rows, total, scores, sim_resp, sim_qual): the page's row
+    indices in rank order, how many rows passed min_score, and the full
+    score arrays aligned with packed.keys.
+    """
+    with stage("match"):
+        scores, sim_resp, sim_qual = score_packed(jd_embeddings, packed)
+        rows, total = rank_rows(scores, top_k, offset, min_score, order)
+    print(f"✅ Ranked {len(packed)} resumes against **{jd_title}**, "
+          f"{int((np.round(scores, 3) >= threshold).sum())} shortlisted\n")
+    return rows, total, scores, sim_resp, sim_qual
+
 # Name extractor fallback
 def _extract_name(parsed, fallback="Unknown"):
     name_lines = parsed.get("name", [])
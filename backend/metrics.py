@@ -0,0 +1,238 @@
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, from single lines up to whole batches
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Observations made while capturing (e.g. in an ingest worker) as
+# [(metric name, label values, value)], replayed by the parent process
+_captured = contextvars.ContextVar("recruitly_metrics_captured", default=None)
+# Stage durations of the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar("recruitly_request_timings", default=None)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _label_values(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _record(self, label_values: Tuple, value: float):
+        captured = _captured.get()
+        if captured is not None:
+            # Applied where the events are replayed, so nothing is counted twice
+            captured.append((self.name, label_values, value))
+            return
+        self._apply(label_values, value)
+        if self is STAGE_SECONDS:
+            _add_request_timing(label_values[0], value)
+
+    @abstractmethod
+    def _apply(self, label_values: Tuple, value: float):
+        """Fold one observation into this metric's values"""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        self._record(self._label_values(labels), amount)
+
+    def _apply(self, label_values, value):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, label_values)} {_format_value(value)}")
+        return lines
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._record(self._label_values(labels), value)
+
+    def _apply(self, label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, label_values)} {_format_value(value)}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        self._record(self._label_values(labels), value)
+
+    def _apply(self, label_values, value):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, label_values, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, label_values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    """Process-wide collection of metrics rendered in Prometheus text format"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "recruitly_stage_seconds", "Time spent in each processing stage", ["stage"])
+REQUEST_SECONDS = REGISTRY.histogram(
+    "recruitly_request_seconds", "HTTP request latency by route", ["method", "route", "status"])
+DOCUMENTS = REGISTRY.counter(
+    "recruitly_documents_total", "Documents processed", ["kind"])
+TEXTS_ENCODED = REGISTRY.counter(
+    "recruitly_texts_encoded_total", "Texts passed through the embedding model", ["purpose"])
+CACHE_REQUESTS = REGISTRY.counter(
+    "recruitly_cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "recruitly_model_load_seconds", "Time taken to load each heavy component", ["component"])
+
+def _add_request_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+@contextmanager
+def stage(name: str):
+    """Time a processing stage into recruitly_stage_seconds and the request breakdown"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+@contextmanager
+def capture():
+    """Collect the observations made inside the block instead of applying them.
+
+    Ingest workers run under capture() and return the events with their
+    results, so stages timed in another process still reach this registry.
+    """
+    events = []
+    token = _captured.set(events)
+    try:
+        yield events
+    finally:
+        _captured.reset(token)
+
+def replay(events):
+    """Apply observations captured by capture() (typically in a worker process)"""
+    for name, label_values, value in events:
+        metric = REGISTRY.get(name)
+        if metric is not None:
+            metric._record(tuple(label_values), value)
+
+@contextmanager
+def request_timings():
+    """Collect the stage durations of one request as {stage: seconds}"""
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format stage durations as a Server-Timing header value (milliseconds)"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
@@ -0,0 +1,228 @@
+import os
+import signal
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Extractors tried in order; the fast text-layer readers come first and
+# pdfplumber's layout analysis is the fallback for PDFs they can't read
+PDF_EXTRACTORS = [
+    name.strip()
+    for name in os.getenv("RECRUITLY_PDF_EXTRACTORS", "pypdfium2,pymupdf,pdfplumber").split(",")
+    if name.strip()
+]
+# Seconds one PDF may spend in extraction before it is given up on
+PDF_TIMEOUT = float(os.getenv("RECRUITLY_PDF_TIMEOUT", "30"))
+# Processes used to extract page ranges of long PDFs in parallel; 0 disables
+PAGE_WORKERS = int(os.getenv("RECRUITLY_PDF_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Only PDFs with at least this many pages are split across page workers
+PARALLEL_MIN_PAGES = int(os.getenv("RECRUITLY_PDF_PARALLEL_MIN_PAGES", "12"))
+# Fast-path output with fewer characters per page is treated as unreadable
+MIN_CHARS_PER_PAGE = 20
+
+class PDFExtractionError(Exception):
+    pass
+
+class PDFTimeoutError(PDFExtractionError):
+    pass
+
+# --- Extractor backends: page count plus a generator of page texts ---
+
+def _pypdfium2_count(path):
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _pypdfium2_pages(path, start, stop) -> Iterator[str]:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        for i in range(start, stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+def _pymupdf_count(path):
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+def _pymupdf_pages(path, start, stop) -> Iterator[str]:
+    import fitz
+    with fitz.open(path) as doc:
+        for i in range(start, stop):
+            yield doc[i].get_text("text")
+
+def _pdfplumber_count(path):
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+def _pdfplumber_pages(path, start, stop) -> Iterator[str]:
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            yield page.extract_text() or ""
+
+# Module each extractor needs; extractors whose module is missing are skipped
+EXTRACTOR_MODULES = {"pypdfium2": "pypdfium2", "pymupdf": "fitz", "pdfplumber": "pdfplumber"}
+
+EXTRACTOR_BACKENDS = {
+    "pypdfium2": (_pypdfium2_count, _pypdfium2_pages),
+    "pymupdf": (_pymupdf_count, _pymupdf_pages),
+    "pdfplumber": (_pdfplumber_count, _pdfplumber_pages),
+}
+
+# --- Timeouts ---
+
+@contextmanager
+def _time_limit(deadline: float):
+    """Interrupt extraction at the deadline.
+
+    Uses SIGALRM where possible (the main thread of a worker process), which
+    also stops a slow pure-Python page mid-way; elsewhere the deadline is
+    only checked between pages. Neither stops a hang inside a C extension;
+    ingest_pool enforces the hard limit by killing the worker.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise PDFTimeoutError("PDF extraction timed out")
+    use_alarm = hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if not use_alarm:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PDFTimeoutError("PDF extraction timed out")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _extract_range(name, path, start, stop, deadline) -> List[str]:
+    _, pages = EXTRACTOR_BACKENDS[name]
+    texts = []
+    with _time_limit(deadline):
+        for text in pages(path, start, stop):
+            texts.append(text.replace("\r\n", "\n").replace("\r", "\n"))
+            if time.monotonic() > deadline:
+                raise PDFTimeoutError("PDF extraction timed out")
+    return texts
+
+def _range_task(name, path, start, stop, timeout):
+    # Deadlines are per process, so page workers get the remaining seconds
+    return _extract_range(name, path, start, stop, time.monotonic() + timeout)
+
+# --- Page-level parallelism ---
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def set_page_workers(workers: int):
+    """Change the page worker count (ingest workers set 0: they already run in parallel)"""
+    global PAGE_WORKERS
+    PAGE_WORKERS = workers
+
+def _get_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _page_pool
+
+def shutdown_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+            _page_pool = None
+
+def _extract_pages(name, path, deadline) -> List[str]:
+    count_pages, _ = EXTRACTOR_BACKENDS[name]
+    with _time_limit(deadline):
+        page_count = count_pages(path)
+    if PAGE_WORKERS < 2 or page_count < PARALLEL_MIN_PAGES:
+        return _extract_range(name, path, 0, page_count, deadline)
+
+    step = -(-page_count // PAGE_WORKERS)
+    pool = _get_page_pool()
+    futures = [
+        pool.submit(_range_task, name, path, start, min(start + step, page_count), deadline - time.monotonic())
+        for start in range(0, page_count, step)
+    ]
+    texts = []
+    try:
+        for future in futures:
+            texts.extend(future.result(timeout=max(deadline - time.monotonic(), 0)))
+    except FutureTimeoutError:
+        for future in futures:
+            future.cancel()
+        raise PDFTimeoutError("PDF extraction timed out")
+    return texts
+
+# --- Public API ---
+
+def available_extractors() -> List[str]:
+    """Configured extractors whose libraries are installed, in the order they are tried"""
+    available = []
+    for name in PDF_EXTRACTORS:
+        module = EXTRACTOR_MODULES.get(name)
+        if module is None:
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+def _readable(texts: List[str]) -> bool:
+    chars = sum(len(text.strip()) for text in texts)
+    garbled = sum(text.count("�") for text in texts)
+    return chars >= MIN_CHARS_PER_PAGE * max(len(texts), 1) and garbled * 10 < max(chars, 1)
+
+def extract_text(path: str, timeout: Optional[float] = None) -> str:
+    """Text of every page of a PDF, joined with newlines.
+
+    Each available extractor is tried in order until one returns readable
+    text; if none does, the first sparse result is returned (e.g. scans).
+    Raises PDFTimeoutError once the whole file takes longer than timeout.
+    """
+    extractors = available_extractors()
+    if not extractors:
+        raise PDFExtractionError(f"No PDF extractor installed (tried {', '.join(PDF_EXTRACTORS)})")
+    deadline = time.monotonic() + (PDF_TIMEOUT if timeout is None else timeout)
+    sparse, error = None, None
+    for name in extractors:
+        try:
+            texts = _extract_pages(name, path, deadline)
+        except PDFTimeoutError:
+            raise
+        except Exception as e:
+            error = e
+            continue
+        if _readable(texts):
+            return "\n".join(texts)
+        if sparse is None:
+            sparse = texts
+    if sparse is not None:
+        return "\n".join(sparse)
+    raise PDFExtractionError(f"Could not extract text from {os.path.basename(path)}: {error}")
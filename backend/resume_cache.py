@@ -0,0 +1,108 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from embedding_service import MODEL_NAME
+from metrics import cache_lookup
+
+# Bump whenever resume parsing changes in a way that alters cached results
+PARSER_VERSION = "4"
+
+CACHE_DIR = os.getenv("RECRUITLY_RESUME_CACHE_DIR", ".cache/resumes")
+CACHE_MAX_BYTES = int(os.getenv("RECRUITLY_RESUME_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Eviction trims the cache to this fraction of max_bytes, so a full cache
+# is not rescanned on every put
+EVICT_TO_FRACTION = 0.8
+
+def content_hash(pdf_bytes: bytes) -> str:
+    """SHA-256 of the PDF bytes plus the model and parser version.
+
+    Results produced by a different model or parser never share a key.
+    """
+    digest = hashlib.sha256(pdf_bytes)
+    digest.update(f"\0{MODEL_NAME}\0{PARSER_VERSION}".encode())
+    return digest.hexdigest()
+
+def file_content_hash(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return content_hash(f.read())
+
+class ResumeCache:
+    """Size-bounded on-disk LRU cache of processed resumes keyed by content hash.
+
+    Each entry is one pickle file; its mtime doubles as the last-access time,
+    and the least recently used files are removed once the directory grows
+    past max_bytes. The total size is tracked in memory (seeded by one scan
+    at startup), so the directory is only walked when eviction is due.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            cache_lookup("resume", False)
+            return None
+        cache_lookup("resume", True)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key: str, value: Dict):
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = f.tell()
+        path = self._path(key)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total += size - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        # Rescan rather than trust the running total: other processes may
+        # share the directory
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
@@ -1,18 +1,28 @@
 # --- resume_embedding_utils.py ---
 import re
-import nltk
-import spacy
-import pdfplumber
+import threading
 import numpy as np
-from nltk import sent_tokenize
 from collections import defaultdict
-from sentence_transformers import SentenceTransformer, util
 from pathlib import Path
 
+from embedding_service import encode, encode_many, TemplateClassifier
+from metrics import TEXTS_ENCODED, stage
+from warmup import timed_load
+
 # --- Setup ---
-nltk.download("punkt")
-nlp = spacy.load("en_core_web_sm")
-sbert = SentenceTransformer("all-MiniLM-L6-v2")
+# spaCy is loaded on first use (or by warmup.warm_up) to keep imports fast
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                with timed_load("spacy"):
+                    import spacy
+                    _nlp = spacy.load("en_core_web_sm")
+    return _nlp
 
 # --- Templates for fallback classification ---
 RESUME_TEMPLATES = {
@@ -25,10 +35,7 @@ RESUME_TEMPLATES = {
     "tech_stack": ["Tech Stack: Python, TensorFlow", "Languages: Java, C++"]
 }
 
-TEMPLATE_EMBEDDINGS = {
-    k: sbert.encode(v, convert_to_tensor=True)
-    for k, v in RESUME_TEMPLATES.items()
-}
+classifier = TemplateClassifier(RESUME_TEMPLATES, threshold=0.4, name="resume_templates")
 
 COMMON_HEADERS = {
     "skills": ["skills", "technical skills"],
@@ -40,6 +47,9 @@ COMMON_HEADERS = {
     "name": ["name", "profile"]
 }
 
+# Sections that get their own embedding for matching
+EMBEDDED_SECTIONS = ["experience", "education", "skills", "projects", "certifications", "tech_stack"]
+
 def normalize_header(text):
     lower = text.lower().strip().strip(":")
     for section, aliases in COMMON_HEADERS.items():
@@ -48,25 +58,79 @@ def normalize_header(text):
     return None
 
 def classify_line(line):
-    emb = sbert.encode(line, convert_to_tensor=True)
-    scores = {
-        k: float(util.cos_sim(emb, TEMPLATE_EMBEDDINGS[k]).max())
-        for k in TEMPLATE_EMBEDDINGS
-    }
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0.4 else None
+    return classifier.classify(line)
+
+def classify_lines(lines):
+    return classifier.classify_many(lines)
+
+def keyword_section(line):
+    """Cheap keyword rules that switch the current section"""
+    lower = line.lower()
+    if any(w in lower for w in ["bachelor", "ph.d", "master", "diploma", "msc", "b.tech", "mba"]):
+        return "education"
+    elif "tech stack" in lower or "languages" in lower or "tools" in lower:
+        return "tech_stack"
+    elif "achievements" in lower or line.startswith(("Built", "Developed")) or "project" in lower:
+        return "projects"
+    elif "work experience" in lower or re.search(r"(intern|engineer|manager|scientist|developer)", lower):
+        return "experience"
+    return None
+
+# Names sit at the top of a resume; never look further down than this
+NAME_SCAN_LINES = 8
+
+NAME_LABEL = re.compile(r"^(?:full\s+)?name\s*[:\-]\s*(?P<name>.+)$", re.IGNORECASE)
+NAME_WORD = re.compile(r"^[A-Z][a-zA-Z.'\-]*$")
+# Capitalized words that make a top line a job title or document heading, not a name
+NOT_NAME_WORDS = {
+    "resume", "curriculum", "vitae", "cv", "biodata", "profile", "summary", "contact", "of", "for", "and",
+    "senior", "junior", "lead", "principal", "staff", "chief", "head", "associate", "assistant", "intern",
+    "engineer", "developer", "scientist", "manager", "analyst", "consultant", "designer", "architect",
+    "director", "officer", "executive", "specialist", "administrator", "technician", "student", "graduate",
+    "data", "software", "machine", "learning", "full", "stack", "web", "product", "project", "business",
+    "marketing", "sales", "research", "operations"
+}
+
+def _name_line(lines):
+    """A line of 2-4 capitalized words above the first title or section line, if any"""
+    for line in lines:
+        words = line.split()
+        if normalize_header(line) or keyword_section(line) or any(w.lower().strip(".") in NOT_NAME_WORDS
+                                                                  for w in words):
+            return None
+        if 2 <= len(words) <= 4 and all(NAME_WORD.match(w) for w in words):
+            return line
+    return None
 
 def extract_name(text):
-    for line in text.splitlines():
-        doc = nlp(line.strip())
-        for ent in doc.ents:
-            if ent.label_ == "PERSON":
-                return ent.text.strip()
+    lines = [line.strip() for line in text.splitlines() if line.strip()][:NAME_SCAN_LINES]
+
+    # Cheapest first: an explicit "Name: ..." line
+    for line in lines:
+        match = NAME_LABEL.match(line)
+        if match:
+            return match.group("name").strip()
+
+    # Then a plain name line at the very top
+    name = _name_line(lines)
+    if name:
+        return name
+
+    # NER over the top lines only, with everything but the entity recognizer disabled
+    with stage("name_ner"):
+        nlp = get_nlp()
+        disabled = [name for name in nlp.pipe_names if name not in ("tok2vec", "ner")]
+        for doc in nlp.pipe(lines, disable=disabled):
+            for ent in doc.ents:
+                if ent.label_ == "PERSON":
+                    return ent.text.strip()
     return None
 
 def pdf_to_text(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join([page.extract_text() or "" for page in pdf.pages])
+    # Fast text-layer extractors first, pdfplumber as the fallback
+    from pdf_extract import extract_text
+    with stage("pdf_extract"):
+        return extract_text(pdf_path)
 
 def extract_resume_sections(text):
     lines = text.splitlines()
@@ -85,7 +149,18 @@ def extract_resume_sections(text):
 
     sections = defaultdict(list)
     current_section = None
-    name_found = extract_name(text)
+    with stage("name_extract"):
+        name_found = extract_name(text)
+
+    # Template classification only happens until the first header or keyword
+    # line sets a section, so batch-encode that leading run of lines up front
+    pending = []
+    for line in merged_lines:
+        if normalize_header(line) or keyword_section(line):
+            break
+        pending.append(line)
+    with stage("resume_classify"):
+        categories = iter(classify_lines(pending))
 
     for line in merged_lines:
         normalized = normalize_header(line)
@@ -93,18 +168,12 @@ def extract_resume_sections(text):
             current_section = normalized
             continue
 
-        lower = line.lower()
-        if any(w in lower for w in ["bachelor", "ph.d", "master", "diploma", "msc", "b.tech", "mba"]):
-            current_section = "education"
-        elif "tech stack" in lower or "languages" in lower or "tools" in lower:
-            current_section = "tech_stack"
-        elif "achievements" in lower or line.startswith(("Built", "Developed")) or "project" in lower:
-            current_section = "projects"
-        elif "work experience" in lower or re.search(r"(intern|engineer|manager|scientist|developer)", lower):
-            current_section = "experience"
+        section = keyword_section(line)
+        if section:
+            current_section = section
 
         if not current_section:
-            current_section = classify_line(line)
+            current_section = next(categories)
 
         if current_section:
             if current_section in ["education", "experience", "certifications"] and sections[current_section]:
@@ -128,8 +197,30 @@ def generate_resume_embedding(parsed_resume):
         parsed_resume.get("tech_stack", [])
     )
     if not combined.strip():
-        return sbert.encode("generic resume", convert_to_numpy=True)
-    return sbert.encode(combined, convert_to_numpy=True)
+        return encode("generic resume")
+    return encode(combined)
+
+def embed_resume_sections(parsed_resume):
+    """Embed every non-empty section of a parsed resume in one batched call"""
+    return embed_resume_sections_batch([parsed_resume])[0]
+
+def embed_resume_sections_batch(parsed_resumes):
+    """Embed the sections of many parsed resumes with a single encode call"""
+    owners, texts = [], []
+    for i, parsed_resume in enumerate(parsed_resumes):
+        for section in EMBEDDED_SECTIONS:
+            section_text = " ".join(parsed_resume.get(section, []))
+            if section_text.strip():
+                owners.append((i, section))
+                texts.append(section_text)
+
+    with stage("resume_embed"):
+        vectors = encode_many(texts)
+    TEXTS_ENCODED.inc(len(texts), purpose="resume_sections")
+    results = [{} for _ in parsed_resumes]
+    for (i, section), vector in zip(owners, vectors):
+        results[i][section] = vector
+    return results
 
 def generate_embeddings_for_all_resumes(pdf_paths):
     results = {}
@@ -152,14 +243,12 @@ def generate_embeddings_for_all_resumes(pdf_paths):
         embedding = generate_resume_embedding(parsed)
         print(f"  🔢 Embedding shape: {embedding.shape}")
 
+        section_embeddings = embed_resume_sections(parsed)
+
         results[file_name] = {
             "embedding": {
-                "skills": sbert.encode(" ".join(parsed.get("skills", [])), convert_to_numpy=True) if parsed.get("skills") else None,
-                "experience": sbert.encode(" ".join(parsed.get("experience", [])), convert_to_numpy=True) if parsed.get("experience") else None,
-                "education": sbert.encode(" ".join(parsed.get("education", [])), convert_to_numpy=True) if parsed.get("education") else None,
-                "certifications": sbert.encode(" ".join(parsed.get("certifications", [])), convert_to_numpy=True) if parsed.get("certifications") else None,
-                "projects": sbert.encode(" ".join(parsed.get("projects", [])), convert_to_numpy=True) if parsed.get("projects") else None,
-                "tech_stack": sbert.encode(" ".join(parsed.get("tech_stack", [])), convert_to_numpy=True) if parsed.get("tech_stack") else None,
+                section: section_embeddings.get(section)
+                for section in EMBEDDED_SECTIONS
             },
             "parsed": parsed
         }
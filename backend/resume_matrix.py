@@ -0,0 +1,223 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from database import DB_PATH, connect
+from embedding_service import normalize_rows
+from matcher import (PackedEmbeddings, top_k_per_jd, score_matrix, score_packed, rank_rows, rank_packed,
+                     RESPONSIBILITY_SECTIONS, QUALIFICATION_SECTIONS)
+from metrics import stage
+from resume_store import blob_to_vector, _ID_CHUNK
+
+# Shortlist size, as a multiple of k, re-scored exactly after a quantized scan
+RERANK_FACTOR = 4
+
+# Side (0 = responsibilities, 1 = qualifications) each embedded section is summed into
+_SECTION_SIDES = {
+    section: side
+    for side, sections in enumerate([RESPONSIBILITY_SECTIONS, QUALIFICATION_SECTIONS])
+    for section in sections
+}
+
+def quantize_vectors(vectors: np.ndarray, dtype: str):
+    """Quantize (..., dim) float32 vectors to "float16" or "int8".
+
+    Returns (quantized, scales). int8 vectors are scaled per vector so the
+    largest component maps to 127, and scales holds one float32 per vector;
+    float16 needs no scale and scales is None.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"Unsupported quantization {dtype}")
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0)[..., None]
+    quantized = np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+class ResumeMatrix:
+    """Match-ready resume vectors in one columnar array.
+
+    vectors is (N, 2, dim): per resume, the unit-normalized sum of its
+    responsibility sections and of its qualification sections (the two
+    sides of calculate_match_score), with a missing side left as a zero
+    vector. Bit 0 / 1 of presence[row] marks the responsibility /
+    qualification side as present. The sides are normalized once when the
+    matrix is built, so scoring a tile is two matrix products; vectors may
+    be float32, or float16 / int8 (with one scale per side, applied to the
+    products) to shrink the storage. slice() packs any row range for the matcher without
+    per-resume dicts, so a ResumeMatrix can be passed wherever the tile
+    scorers take a PackedEmbeddings.
+    """
+    sides = (RESPONSIBILITY_SECTIONS, QUALIFICATION_SECTIONS)
+
+    def __init__(self, ids, vectors, presence, scales=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = vectors
+        self.presence = presence
+        self.scales = scales
+        self._keys = None
+        self._rows = None
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[2]
+
+    @property
+    def quantized(self) -> bool:
+        return self.vectors.dtype != np.float32
+
+    @property
+    def keys(self) -> List[int]:
+        if self._keys is None:
+            self._keys = self.ids.tolist()
+        return self._keys
+
+    def row(self, resume_id: int) -> Optional[int]:
+        """Row holding resume_id, or None"""
+        if self._sorted is None:
+            self._sorted = bool(np.all(self.ids[:-1] <= self.ids[1:]))
+        if self._sorted:
+            # Stored matrices are in id order, so no per-id lookup table is needed
+            row = int(np.searchsorted(self.ids, resume_id))
+            return row if row < len(self.ids) and self.ids[row] == resume_id else None
+        if self._rows is None:
+            self._rows = {resume_id: row for row, resume_id in enumerate(self.keys)}
+        return self._rows.get(resume_id)
+
+    def take(self, resume_ids: Iterable[int]) -> "ResumeMatrix":
+        """Rows of resume_ids in that order (repeats allowed); ids not in the matrix get empty rows"""
+        resume_ids = list(resume_ids)
+        rows = [self.row(resume_id) for resume_id in resume_ids]
+        found = np.array([row is not None for row in rows], dtype=bool)
+        if not found.any():
+            return ResumeMatrix(resume_ids, np.zeros((len(rows), len(self.sides), self.dim), dtype=np.float32),
+                                np.zeros(len(rows), dtype=np.uint8))
+        index = np.array([row or 0 for row in rows], dtype=np.int64)
+        vectors = np.asarray(self.vectors[index])
+        vectors[~found] = 0
+        presence = np.where(found, np.asarray(self.presence)[index], 0).astype(np.uint8)
+        scales = np.asarray(self.scales[index]) if self.scales is not None else None
+        return ResumeMatrix(resume_ids, vectors, presence, scales)
+
+    def slice(self, start: int, stop: int) -> PackedEmbeddings:
+        """Rows start:stop packed for the matcher.
+
+        float32 rows are views; float16 rows are cast to float32, and int8
+        rows stay codes (cast to float32) with their scales, which the
+        matcher applies after the matrix products.
+        """
+        vectors = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        scales = np.asarray(self.scales[start:stop]) if self.scales is not None else None
+        presence = np.asarray(self.presence[start:stop])
+        return PackedEmbeddings(self.keys[start:stop], vectors[:, 0], (presence & 1) != 0,
+                                vectors[:, 1], (presence & 2) != 0, normalized=True, scales=scales)
+
+    def packed(self) -> PackedEmbeddings:
+        return self.slice(0, len(self))
+
+    @classmethod
+    def from_embeddings(cls, embeddings: Dict[int, Dict[str, np.ndarray]], dim: Optional[int] = None):
+        """Build from {resume_id: {section: vector}}"""
+        ids = list(embeddings)
+        if dim is None:
+            dim = next((len(vec) for emb in embeddings.values() for vec in emb.values() if vec is not None), 0)
+        vectors = np.zeros((len(ids), len(cls.sides), dim), dtype=np.float32)
+        presence = np.zeros(len(ids), dtype=np.uint8)
+        for row, resume_id in enumerate(ids):
+            for section, vec in embeddings[resume_id].items():
+                side = _SECTION_SIDES.get(section)
+                if side is not None and vec is not None:
+                    vectors[row, side] += vec
+                    presence[row] |= 1 << side
+        return cls(ids, normalize_rows(vectors), presence)
+
+    @classmethod
+    def from_store(cls, resume_ids: Optional[Iterable[int]] = None, db_path: str = DB_PATH):
+        """Load stored resumes (all of them, ordered by id, unless resume_ids is given)"""
+        with connect(db_path) as conn:
+            if resume_ids is None:
+                ids = [row[0] for row in conn.execute("SELECT id FROM resumes ORDER BY id")]
+            else:
+                ids = list(resume_ids)
+            rows = {resume_id: row for row, resume_id in enumerate(ids)}
+            vectors = None
+            presence = np.zeros(len(ids), dtype=np.uint8)
+            for resume_id, section, blob in _section_rows(conn, ids if resume_ids is not None else None):
+                row, side = rows.get(resume_id), _SECTION_SIDES.get(section)
+                if row is None or side is None:
+                    continue
+                vec = blob_to_vector(blob)
+                if vectors is None:
+                    vectors = np.zeros((len(ids), len(cls.sides), len(vec)), dtype=np.float32)
+                vectors[row, side] += vec
+                presence[row] |= 1 << side
+        if vectors is None:
+            vectors = np.zeros((len(ids), len(cls.sides), 0), dtype=np.float32)
+        return cls(ids, normalize_rows(vectors), presence)
+
+def top_k_exact(packed_jds: PackedEmbeddings, matrix: ResumeMatrix, k: int, tile_size: int = 8192,
+                rerank_factor: int = RERANK_FACTOR, db_path: str = DB_PATH):
+    """top_k_per_jd with exact float32 scores for a quantized matrix.
+
+    The quantized matrix is scanned for k * rerank_factor candidates per JD,
+    which are then re-scored from the float32 embeddings in the resume
+    store, so shortlisted scores equal calculate_match_score.
+    """
+    if not matrix.quantized:
+        return top_k_per_jd(packed_jds, matrix, k, tile_size)
+    k = min(k, len(matrix))
+    shortlist, _ = top_k_per_jd(packed_jds, matrix, k * rerank_factor, tile_size)
+    shortlist_ids = matrix.ids[shortlist]
+    exact = ResumeMatrix.from_store(np.unique(shortlist_ids).tolist(), db_path=db_path)
+    scores = np.take_along_axis(score_matrix(packed_jds, exact), np.searchsorted(exact.ids, shortlist_ids), axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(shortlist, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+def score_exact(jd_embeddings, resume_ids, batch: int = 10000, db_path: str = DB_PATH):
+    """score_packed for resume_ids from the float32 embeddings in the resume store, batch by batch"""
+    resume_ids = list(resume_ids)
+    parts = [
+        score_packed(jd_embeddings, ResumeMatrix.from_store(resume_ids[i:i + batch], db_path=db_path))
+        for i in range(0, len(resume_ids), batch)
+    ]
+    if not parts:
+        return tuple(np.zeros(0, dtype=np.float64) for _ in range(3))
+    return tuple(np.concatenate(values) for values in zip(*parts))
+
+def rank_exact(jd_title, jd_embeddings, matrix: ResumeMatrix, threshold=0.8, top_k=None, offset=0,
+               min_score=None, order="desc", rerank_factor: int = RERANK_FACTOR, db_path: str = DB_PATH):
+    """matcher.rank_packed with exact float32 scores on the page for a quantized matrix.
+
+    The quantized scan picks (offset + top_k) * rerank_factor rows in the
+    requested order; those are re-scored from the resume store before the
+    page is chosen, so page scores equal calculate_match_score. Rows
+    outside that shortlist keep their quantized scores.
+    """
+    if not matrix.quantized:
+        return rank_packed(jd_title, jd_embeddings, matrix, threshold, top_k, offset, min_score, order)
+    with stage("match"):
+        scores, sim_resp, sim_qual = score_packed(jd_embeddings, matrix)
+        end = None if top_k is None else (offset + max(top_k, 0)) * rerank_factor
+        shortlist, _ = rank_rows(scores, end, 0, None, order)
+        exact = score_exact(jd_embeddings, [matrix.keys[row] for row in shortlist], db_path=db_path)
+        for values, exact_values in zip((scores, sim_resp, sim_qual), exact):
+            values[shortlist] = exact_values
+        rows, total = rank_rows(scores, top_k, offset, min_score, order)
+    return rows, total, scores, sim_resp, sim_qual
+
+def _section_rows(conn, resume_ids):
+    if resume_ids is None:
+        yield from conn.execute("SELECT resume_id, section, vector FROM resume_embeddings")
+        return
+    for i in range(0, len(resume_ids), _ID_CHUNK):
+        chunk = resume_ids[i:i + _ID_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        yield from conn.execute(
+            f"SELECT resume_id, section, vector FROM resume_embeddings WHERE resume_id IN ({placeholders})", chunk
+        )
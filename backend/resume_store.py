@@ -0,0 +1,120 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from database import DB_PATH, connect
+
+# SQLite's default limit on bound parameters is 999
+_ID_CHUNK = 500
+
+def vector_to_blob(vector) -> bytes:
+    """Serialize an embedding as raw little-endian float32 bytes"""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+def blob_to_vector(blob: bytes) -> np.ndarray:
+    """Inverse of vector_to_blob"""
+    return np.frombuffer(blob, dtype="<f4")
+
+def init_resume_tables(cursor):
+    """Create the tables holding processed resumes and their embeddings"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT,
+            embedding TEXT,
+            parsed TEXT,
+            summary TEXT,
+            content_hash TEXT
+        )
+    """)
+    # Databases created before content hashing lack the column
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(resumes)")}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE resumes ADD COLUMN content_hash TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_resumes_content_hash ON resumes (content_hash)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_embeddings (
+            resume_id INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (resume_id, section),
+            FOREIGN KEY (resume_id) REFERENCES resumes (id)
+        )
+    """)
+
+def save_resume(filename: str, result: Dict, content_hash: Optional[str] = None, db_path: str = DB_PATH) -> int:
+    """Persist a processed resume (parsed sections, summary, section embeddings).
+
+    Returns the new resume id.
+    """
+    with connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO resumes (filename, parsed, summary, content_hash) VALUES (?, ?, ?, ?)",
+            (filename, json.dumps(result.get("parsed", {})), result.get("summary", ""), content_hash)
+        )
+        resume_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO resume_embeddings (resume_id, section, vector) VALUES (?, ?, ?)",
+            [
+                (resume_id, section, vector_to_blob(vector))
+                for section, vector in result.get("embedding", {}).items()
+                if vector is not None
+            ]
+        )
+        return resume_id
+
+def find_resume_by_hash(content_hash: str, db_path: str = DB_PATH) -> Optional[int]:
+    """Id of a stored resume with the given content hash, if any"""
+    with connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT id FROM resumes WHERE content_hash = ? ORDER BY id LIMIT 1", (content_hash,)
+        ).fetchone()
+    return row[0] if row else None
+
+def list_resume_ids(after_id: int = 0, db_path: str = DB_PATH) -> List[int]:
+    """Ids of stored resumes newer than after_id, ascending"""
+    with connect(db_path) as conn:
+        rows = conn.execute("SELECT id FROM resumes WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+    return [row[0] for row in rows]
+
+def get_resumes(resume_ids: Iterable[int], db_path: str = DB_PATH) -> Dict[int, Dict]:
+    """Stored resumes (without embeddings) for the given ids as {id: record}"""
+    resume_ids = list(resume_ids)
+    records = {}
+    with connect(db_path) as conn:
+        for i in range(0, len(resume_ids), _ID_CHUNK):
+            chunk = resume_ids[i:i + _ID_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT id, filename, parsed, summary FROM resumes WHERE id IN ({placeholders})", chunk
+            )
+            for row in rows:
+                records[row[0]] = _resume_record(row)
+    return records
+
+def load_embeddings(resume_ids: Iterable[int], db_path: str = DB_PATH) -> Dict[int, Dict[str, np.ndarray]]:
+    """Load section embeddings for the given resume ids as {id: {section: vector}}"""
+    resume_ids = list(resume_ids)
+    embeddings = {resume_id: {} for resume_id in resume_ids}
+    with connect(db_path) as conn:
+        for i in range(0, len(resume_ids), _ID_CHUNK):
+            chunk = resume_ids[i:i + _ID_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT resume_id, section, vector FROM resume_embeddings WHERE resume_id IN ({placeholders})",
+                chunk
+            )
+            for resume_id, section, blob in rows:
+                embeddings[resume_id][section] = blob_to_vector(blob)
+    return embeddings
+
+def _resume_record(row) -> Dict:
+    resume_id, filename, parsed, summary = row
+    return {
+        "id": resume_id,
+        "filename": filename,
+        "parsed": json.loads(parsed) if parsed else {},
+        "summary": summary or ""
+    }
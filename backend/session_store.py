@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from resume_store import get_resumes
+
+# Workspaces idle for longer than this are dropped
+SESSION_TTL_SECONDS = int(os.getenv("RECRUITLY_SESSION_TTL", str(8 * 3600)))
+# Upper bound on live workspaces; the least recently used one is dropped first
+MAX_WORKSPACES = int(os.getenv("RECRUITLY_MAX_WORKSPACES", "256"))
+# Approximate bytes of resume data kept in memory across all workspaces
+SESSION_MEMORY_BUDGET = int(os.getenv("RECRUITLY_SESSION_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+DEFAULT_WORKSPACE = "default"
+
+class Workspace:
+    """One recruiter's (or requisition's) JD and uploaded resumes.
+
+    Resume records hold the stored resume id plus parsed sections and
+    summary. When the session store runs over its memory budget the heavy
+    fields are spilled: only ids stay in memory and records are reloaded
+    from the resume store on the next read.
+    """
+    def __init__(self, workspace_id: str):
+        self.id = workspace_id
+        self.jd = None
+        self.matches = None
+        self.last_used = time.monotonic()
+        self._resumes = {}
+        self._nbytes = 0
+        self._spilled = False
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def set_jd(self, jd: Dict):
+        with self._lock:
+            self.jd = jd
+            self.matches = None
+
+    def add_resume(self, filename: str, result: Dict):
+        record = {
+            "id": result.get("id"),
+            "filename": filename,
+            "parsed": result["parsed"],
+            "summary": result.get("summary", "")
+        }
+        with self._lock:
+            previous = self._resumes.get(filename)
+            if previous is not None:
+                self._nbytes -= _record_size(previous)
+            self._resumes[filename] = record
+            self._nbytes += _record_size(record)
+
+    def resumes(self) -> Dict[str, Dict]:
+        """Resume records keyed by filename, reloading spilled ones from the store"""
+        with self._lock:
+            resumes = dict(self._resumes)
+            spilled = self._spilled
+        if not spilled:
+            return resumes
+        missing = [record["id"] for record in resumes.values() if "parsed" not in record]
+        loaded = get_resumes(missing) if missing else {}
+        return {
+            filename: record if "parsed" in record else {**loaded.get(record["id"], {"parsed": {}, "summary": ""}),
+                                                         "filename": filename}
+            for filename, record in resumes.items()
+        }
+
+    def spill(self) -> int:
+        """Drop in-memory parsed sections of stored resumes; returns bytes freed"""
+        with self._lock:
+            freed = 0
+            for filename, record in self._resumes.items():
+                if "parsed" in record and record.get("id") is not None:
+                    freed += _record_size(record)
+                    self._resumes[filename] = {"id": record["id"], "filename": filename}
+            self._nbytes -= freed
+            self._spilled = self._spilled or freed > 0
+            return freed
+
+    def clear(self):
+        with self._lock:
+            self.jd = None
+            self.matches = None
+            self._resumes = {}
+            self._nbytes = 0
+            self._spilled = False
+
+def _record_size(record: Dict) -> int:
+    if "parsed" not in record:
+        return 0
+    return len(json.dumps(record["parsed"])) + len(record.get("summary", ""))
+
+class SessionStore:
+    """Workspaces keyed by id with LRU and TTL eviction and a memory budget"""
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_workspaces: int = MAX_WORKSPACES,
+                 memory_budget: int = SESSION_MEMORY_BUDGET):
+        self.ttl_seconds = ttl_seconds
+        self.max_workspaces = max(1, max_workspaces)
+        self.memory_budget = memory_budget
+        self._workspaces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._workspaces)
+
+    def create(self) -> Workspace:
+        return self.get(uuid.uuid4().hex)
+
+    def get(self, workspace_id: Optional[str] = None) -> Workspace:
+        """Return the workspace for workspace_id, creating it if needed"""
+        workspace_id = workspace_id or DEFAULT_WORKSPACE
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is None:
+                workspace = self._workspaces[workspace_id] = Workspace(workspace_id)
+                while len(self._workspaces) > self.max_workspaces:
+                    self._workspaces.popitem(last=False)
+            else:
+                self._workspaces.move_to_end(workspace_id)
+            workspace.last_used = now
+            return workspace
+
+    def delete(self, workspace_id: str) -> bool:
+        with self._lock:
+            return self._workspaces.pop(workspace_id, None) is not None
+
+    def enforce_budget(self):
+        """Spill the least recently used workspaces until under the memory budget"""
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        total = sum(workspace.nbytes for workspace in workspaces)
+        # The most recently used workspace is spilled last
+        for workspace in workspaces:
+            if total <= self.memory_budget:
+                break
+            total -= workspace.spill()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        return {
+            "workspaces": len(workspaces),
+            "resident_bytes": sum(workspace.nbytes for workspace in workspaces),
+            "memory_budget": self.memory_budget
+        }
+
+    def _expire(self, now: float):
+        while self._workspaces:
+            oldest = next(iter(self._workspaces.values()))
+            if now - oldest.last_used <= self.ttl_seconds:
+                break
+            self._workspaces.popitem(last=False)
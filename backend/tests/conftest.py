@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The backend modules are imported by name, as app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connect, close_pools  # noqa: E402
+from resume_store import init_resume_tables, save_resume  # noqa: E402
+
+DIM = 8
+SECTIONS = ["experience", "projects", "education", "skills", "certifications"]
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "recruitly.db")
+    with connect(path) as conn:
+        init_resume_tables(conn.cursor())
+    yield path
+    close_pools()
+
+@pytest.fixture
+def add_resumes(db_path):
+    """add_resumes(n) stores n resumes with random section embeddings; returns their ids"""
+    rng = np.random.default_rng(0)
+
+    def add(n, sections=SECTIONS):
+        ids = []
+        for _ in range(n):
+            embedding = {section: rng.standard_normal(DIM).astype(np.float32) for section in sections}
+            result = {"parsed": {}, "summary": "", "embedding": embedding}
+            ids.append(save_resume(f"resume-{len(ids)}.pdf", result, db_path=db_path))
+        return ids
+    return add
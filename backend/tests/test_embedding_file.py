@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from conftest import DIM
+from embedding_file import EmbeddingFile, INDEX_DTYPE, _HEADER
+from resume_matrix import ResumeMatrix
+
+def _open(tmp_path, db_path, **kwargs):
+    return EmbeddingFile(str(tmp_path / "embeddings.bin"), db_path=db_path, **kwargs)
+
+def _set_header_field(path, name, value):
+    """Overwrite one header field in place, as another writer or version would have left it"""
+    fields = ["magic", "version", "sides", "dim", "count", "dtype", "model", "layout"]
+    with open(path, "r+b") as f:
+        values = list(_HEADER.unpack(f.read(_HEADER.size)))
+        values[fields.index(name)] = value
+        f.seek(0)
+        f.write(_HEADER.pack(*values))
+
+def test_sync_round_trip(tmp_path, db_path, add_resumes):
+    ids = add_resumes(5)
+    matrix = _open(tmp_path, db_path).sync()
+
+    expected = ResumeMatrix.from_store(ids, db_path=db_path)
+    assert matrix.keys == ids
+    assert matrix.dim == DIM
+    np.testing.assert_array_equal(np.asarray(matrix.vectors), expected.vectors)
+    np.testing.assert_array_equal(np.asarray(matrix.presence), expected.presence)
+
+    # A fresh instance maps the same rows without re-syncing
+    reopened = _open(tmp_path, db_path).matrix()
+    assert reopened.keys == ids
+    np.testing.assert_array_equal(np.asarray(reopened.vectors), expected.vectors)
+
+def test_sync_appends_new_ids(tmp_path, db_path, add_resumes):
+    first = add_resumes(3)
+    embedding_file = _open(tmp_path, db_path)
+    before = np.array(embedding_file.sync().vectors)
+
+    second = add_resumes(2, sections=["skills"])
+    matrix = embedding_file.sync()
+
+    assert matrix.keys == first + second
+    np.testing.assert_array_equal(np.asarray(matrix.vectors[:3]), before)
+    # Only the qualification side is present for resumes with just skills
+    assert list(np.asarray(matrix.presence[3:])) == [2, 2]
+    assert not np.asarray(matrix.vectors[3:, 0]).any()
+
+@pytest.mark.parametrize("change", ["model", "dtype", "version"])
+def test_incompatible_file_is_rebuilt(tmp_path, db_path, add_resumes, change):
+    ids = add_resumes(4)
+    path = str(tmp_path / "embeddings.bin")
+    _open(tmp_path, db_path).sync()
+
+    kwargs = {}
+    if change == "model":
+        kwargs["model_name"] = "another-model"
+    elif change == "dtype":
+        kwargs["dtype"] = "int8"
+    else:
+        _set_header_field(path, "version", 1)
+
+    embedding_file = _open(tmp_path, db_path, **kwargs)
+    # An incompatible file is never served
+    assert len(embedding_file.matrix()) == 0
+    matrix = embedding_file.sync()
+    assert matrix.keys == ids
+    header = embedding_file._read_header()
+    assert embedding_file._compatible(header)
+    assert header["count"] == len(ids)
+    if change == "dtype":
+        assert matrix.vectors.dtype == np.int8
+        assert matrix.scales is not None
+
+def test_header_behind_index_recovers(tmp_path, db_path, add_resumes):
+    ids = add_resumes(3)
+    path = str(tmp_path / "embeddings.bin")
+    embedding_file = _open(tmp_path, db_path)
+    embedding_file.sync()
+    ids += add_resumes(2)
+    embedding_file.sync()
+
+    # An append that wrote rows and index entries but crashed before publishing the count
+    _set_header_field(path, "count", 3)
+    reopened = _open(tmp_path, db_path)
+    assert reopened.matrix().keys == ids[:3]
+
+    matrix = reopened.sync()
+    assert matrix.keys == ids
+    expected = ResumeMatrix.from_store(ids, db_path=db_path)
+    np.testing.assert_array_equal(np.asarray(matrix.vectors), expected.vectors)
+    with open(f"{path}.idx", "rb") as f:
+        assert len(f.read()) == len(ids) * INDEX_DTYPE.itemsize
+
+def test_take_missing_ids(tmp_path, db_path, add_resumes):
+    ids = add_resumes(3)
+    matrix = _open(tmp_path, db_path).sync()
+
+    taken = matrix.take([ids[2], 9999, ids[0], ids[2]])
+    assert taken.keys == [ids[2], 9999, ids[0], ids[2]]
+    np.testing.assert_array_equal(taken.vectors[0], np.asarray(matrix.vectors[2]))
+    np.testing.assert_array_equal(taken.vectors[2], np.asarray(matrix.vectors[0]))
+    assert not taken.vectors[1].any()
+    assert list(taken.presence) == [3, 0, 3, 3]
+
+def test_take_from_empty_file(tmp_path, db_path):
+    matrix = _open(tmp_path, db_path).sync()
+    taken = matrix.take([1, 2])
+    assert len(taken) == 2
+    assert not taken.presence.any()
+
+def test_rows_wait_until_dim_is_known(tmp_path, db_path, add_resumes):
+    # Resumes without embeddings can't set the row width; they are written once one arrives
+    empty = add_resumes(2, sections=[])
+    embedding_file = _open(tmp_path, db_path)
+    assert len(embedding_file.sync()) == 0
+    embedded = add_resumes(1)
+    matrix = embedding_file.sync()
+    assert matrix.keys == empty + embedded
+    assert list(np.asarray(matrix.presence)) == [0, 0, 3]
+
+def test_header_layout(tmp_path, db_path, add_resumes):
+    add_resumes(1)
+    embedding_file = _open(tmp_path, db_path)
+    embedding_file.sync()
+    header = embedding_file._read_header()
+    assert header["sides"] == 2
+    assert header["layout"] == ["+".join(sections) for sections in ResumeMatrix.sides]
@@ -0,0 +1,34 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from metrics import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger("Warmup")
+
+# Seconds spent loading each heavy component, filled in as they load
+LOAD_TIMES = {}
+
+@contextmanager
+def timed_load(component: str):
+    """Record how long loading a component takes"""
+    start = time.perf_counter()
+    yield
+    LOAD_TIMES[component] = round(time.perf_counter() - start, 3)
+    MODEL_LOAD_SECONDS.set(LOAD_TIMES[component], component=component)
+    logger.info(f"Loaded {component} in {LOAD_TIMES[component]}s")
+
+def warm_up():
+    """Load every heavy model now instead of on the first request that needs it.
+
+    Returns the per-component load times in seconds.
+    """
+    from embedding_service import get_model
+    import jd_embedding_utils
+    import resume_embedding_utils
+
+    get_model()
+    resume_embedding_utils.get_nlp()
+    jd_embedding_utils.classifier.warm_up()
+    resume_embedding_utils.classifier.warm_up()
+    return dict(LOAD_TIMES)
@@ -11,6 +11,29 @@ import axios from "axios";
 import { FiRefreshCw } from "react-icons/fi";
 import "react-toastify/dist/ReactToastify.css";
 
+// crypto.randomUUID only exists in secure contexts (https or localhost);
+// getRandomValues also works when the app is served over plain http
+const newWorkspaceId = () => {
+  if (typeof crypto.randomUUID === "function") {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+};
+
+// Each browser keeps its own server-side workspace so recruiters don't share state
+const getWorkspaceId = () => {
+  let workspaceId = localStorage.getItem("workspaceId");
+  if (!workspaceId) {
+    workspaceId = newWorkspaceId();
+    localStorage.setItem("workspaceId", workspaceId);
+  }
+  return workspaceId;
+};
+
+const WORKSPACE_HEADERS = { "X-Workspace-Id": getWorkspaceId() };
+axios.defaults.headers.common["X-Workspace-Id"] = WORKSPACE_HEADERS["X-Workspace-Id"];
+
 function App() {
   const [loading, setLoading] = useState(false);
 
@@ -24,6 +47,8 @@ function App() {
     return savedResults ? JSON.parse(savedResults) : [];
   });
 
+  const [uploadProgress, setUploadProgress] = useState({ done: 0, total: 0 });
+
   const [matchResults, setMatchResults] = useState(() => {
     const savedResults = localStorage.getItem("matchResults");
     return savedResults ? JSON.parse(savedResults) : null;
@@ -80,21 +105,61 @@ function App() {
   const handleResumeUpload = async (files) => {
     if (files.length === 0) return;
     setLoading(true);
+    setUploadProgress({ done: 0, total: files.length });
+    setResumeResults([]);
     const formData = new FormData();
     files.forEach((file) => {
       formData.append("files", file);
     });
     try {
-      const response = await axios.post("/api/upload-resumes", formData, {
-        headers: { "Content-Type": "multipart/form-data" },
+      // Each resume arrives as its own server-sent event as soon as it is processed
+      const response = await fetch("/api/upload-resumes/stream", {
+        method: "POST",
+        headers: WORKSPACE_HEADERS,
+        body: formData,
       });
-      const results = response.data;
-      const processedResumes = Object.keys(results).map((filename) => ({
-        name: filename,
-        ...results[filename],
-      }));
-      setResumeResults(processedResumes);
-      notifySuccess(`Successfully processed ${processedResumes.length} resumes!`);
+      if (!response.ok || !response.body) {
+        throw new Error(`Upload failed with status ${response.status}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let summary = null;
+      let processed = 0;
+      let failed = 0;
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop();
+        frames.forEach((frame) => {
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) return;
+          const payload = JSON.parse(data);
+          if (event === "resume") {
+            setUploadProgress((prev) => ({ ...prev, done: prev.done + 1 }));
+            if (payload.error) {
+              failed += 1;
+            } else {
+              processed += 1;
+              setResumeResults((prev) => [...prev, { name: payload.filename, ...payload }]);
+            }
+          } else if (event === "done") {
+            summary = payload;
+          }
+        });
+      }
+      if (!summary) {
+        // The stream ended without its "done" event: the server or a proxy cut it off
+        notifyError(`Upload interrupted after ${processed + failed} of ${files.length} resumes (${processed} processed).`);
+        return;
+      }
+      if (failed > 0) {
+        notifyError(`${failed} of ${files.length} resumes could not be processed.`);
+      }
+      notifySuccess(`Successfully processed ${processed} resumes!`);
     } catch (error) {
       console.error("Error processing resumes:", error);
       notifyError("Error processing resumes. Check if files are valid PDFs.");
@@ -159,7 +224,7 @@ function App() {
             <Route
               path="/resume-upload"
               element={
-                <ResumeUploadPage onUpload={handleResumeUpload} isLoading={loading} resumeResults={resumeResults} />
+                <ResumeUploadPage onUpload={handleResumeUpload} isLoading={loading} resumeResults={resumeResults} uploadProgress={uploadProgress} />
               }
             />
             <Route
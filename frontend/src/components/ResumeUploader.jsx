@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { FiUpload, FiFile, FiX, FiCheckCircle } from 'react-icons/fi';
 
-const ResumeUploader = ({ onUpload, isLoading }) => {
+const ResumeUploader = ({ onUpload, isLoading, progress }) => {
   const [selectedFiles, setSelectedFiles] = useState([]);
   const [isDragging, setIsDragging] = useState(false);
 
@@ -128,7 +128,10 @@ const ResumeUploader = ({ onUpload, isLoading }) => {
         {isLoading ? (
           <div className="flex items-center">
             <div className="animate-spin rounded-full h-4 w-4 border-t-2 border-white mr-2"></div>
-            <span>Processing Resumes...</span>
+            <span>
+              Processing Resumes...
+              {progress && progress.total > 0 && ` (${progress.done}/${progress.total})`}
+            </span>
           </div>
         ) : (
           <>
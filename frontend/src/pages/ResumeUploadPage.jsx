@@ -2,12 +2,12 @@ import React from "react";
 import ResumeUploader from "../components/ResumeUploader";
 import { useNavigate } from "react-router-dom";
 
-const ResumeUploadPage = ({ onUpload, isLoading, resumeResults }) => {
+const ResumeUploadPage = ({ onUpload, isLoading, resumeResults, uploadProgress }) => {
   const navigate = useNavigate();
   return (
     <div>
-      <ResumeUploader onUpload={onUpload} isLoading={isLoading} />
-      {resumeResults.length > 0 && (
+      <ResumeUploader onUpload={onUpload} isLoading={isLoading} progress={uploadProgress} />
+      {resumeResults.length > 0 && !isLoading && (
         <div className="mt-6 bg-white p-5 rounded-lg shadow-sm">
           <div className="flex items-center justify-between">
             <div>